@@ -1,17 +1,34 @@
+import time
+
 from Board import Board
 from Engine import Engine
+from Move import decode
 from PiecesCollection import PiecesCollection
+from SearchWorker import SearchWorker
+from TimeManager import TimeManager
 from UI import UI
 
 
 class App:
-    def __init__(self):
+    def __init__(self, board_type=Board, engine_colour=None, clock_time=300.0, increment=2.0):
+        # Board or BitBoard position backend
+        self.board_type = board_type
+
         self.pieces = None
         self.board = None
         self.engine = None
         self.ui = None
         self.mate = False
 
+        # Colour played by the engine, None if both sides are played by mouse
+        self.engine_colour = engine_colour
+        self.search_worker = None
+        self.time_manager = TimeManager()
+        # Engine clock in seconds
+        self.engine_clock = clock_time
+        self.increment = increment
+        self.search_start = None
+
     def __initialize_pieces(self):
         """"Create pieces"""
         self.pieces = PiecesCollection()
@@ -19,7 +36,7 @@ class App:
 
     def __initialize_board(self, pieces):
         """"Create Board, pieces and place them"""
-        self.board = Board()
+        self.board = self.board_type()
         self.board.set_pieces_collection(pieces)
         self.board.configure_pieces()
 
@@ -37,14 +54,46 @@ class App:
         self.__initialize_board(self.pieces)
         self.__initialize_engine(self.board, self.pieces)
         self.__initialize_ui(self.engine, self.board)
+        if self.engine_colour is not None:
+            self.search_worker = SearchWorker(self.pieces)
 
     def set_mate(self):
         self.mate = True
 
+    def is_engine_turn(self):
+        """Check if engine plays side to move"""
+        return self.board.current_colour() == self.engine_colour
+
+    def __update_engine_move(self):
+        """Start search on engine turn and play its move once found, without blocking the screen"""
+        if not self.is_engine_turn():
+            return
+
+        # Split the rest of the clock across next moves
+        if self.search_start is None:
+            soft_time_limit, time_limit = self.time_manager.allocate(self.engine_clock, self.increment)
+            self.search_start = time.perf_counter()
+            self.search_worker.start(self.board, time_limit=time_limit, soft_time_limit=soft_time_limit)
+            return
+
+        result = self.search_worker.poll()
+        if result is None:
+            return
+
+        self.engine_clock += self.increment - (time.perf_counter() - self.search_start)
+        self.search_start = None
+
+        location, move, flags = decode(result.best_move)
+        self.ui.previous_location = location
+        self.ui.previous_move = move
+        self.engine.play_move(self.board, result.best_move)
+
     def run_game(self):
         """"Loop for screen and key events"""
         self.__initialize_game()
         while not self.mate:
             self.ui.update_screen()
             self.ui.check_events()
+            if self.search_worker is not None:
+                self.__update_engine_move()
         print('mate')
@@ -0,0 +1,182 @@
+from Piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+
+SQUARES_NUM = 8
+
+# Square index is rank * 8 + file
+SQUARES = tuple((rank, file) for rank in range(SQUARES_NUM) for file in range(SQUARES_NUM))
+
+KNIGHT_OFFSETS = ((1, 2), (1, -2), (-1, -2), (-1, 2), (2, 1), (2, -1), (-2, 1), (-2, -1))
+KING_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# Sliding directions, rook directions go first and then bishop ones
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1))
+ORTHOGONAL_DIRECTIONS_NUM = 4
+
+
+def on_board(rank, file):
+    """Check if location exists on board"""
+    return 0 <= rank < SQUARES_NUM and 0 <= file < SQUARES_NUM
+
+
+def jump_targets(offsets):
+    """Build squares reachable from each square by given offsets"""
+    targets = []
+    for rank, file in SQUARES:
+        targets.append(tuple((rank + rank_step, file + file_step) for rank_step, file_step in offsets
+                             if on_board(rank + rank_step, file + file_step)))
+
+    return tuple(targets)
+
+
+def ray_squares(rank, file, rank_step, file_step):
+    """Build squares in given direction ordered from the nearest one"""
+    ray = []
+    rank, file = rank + rank_step, file + file_step
+    while on_board(rank, file):
+        ray.append((rank, file))
+        rank, file = rank + rank_step, file + file_step
+
+    return tuple(ray)
+
+
+def pawn_pushes(rank_step):
+    """Build single and double forward squares of a pawn from each square"""
+    pushes = []
+    for rank, file in SQUARES:
+        pushes.append(tuple((rank + rank_step * i, file) for i in (1, 2) if on_board(rank + rank_step * i, file)))
+
+    return tuple(pushes)
+
+
+KNIGHT_TARGETS = jump_targets(KNIGHT_OFFSETS)
+KING_TARGETS = jump_targets(KING_OFFSETS)
+
+# Squares attacked by pawn of given colour
+PAWN_ATTACKS = {"white": jump_targets(((1, 1), (1, -1))),
+                "black": jump_targets(((-1, 1), (-1, -1)))}
+PAWN_PUSHES = {"white": pawn_pushes(1),
+               "black": pawn_pushes(-1)}
+
+# Rays of each square in order of DIRECTIONS
+RAYS = tuple(tuple(ray_squares(rank, file, rank_step, file_step) for rank_step, file_step in DIRECTIONS)
+             for rank, file in SQUARES)
+ROOK_RAYS = tuple(rays[:ORTHOGONAL_DIRECTIONS_NUM] for rays in RAYS)
+BISHOP_RAYS = tuple(rays[ORTHOGONAL_DIRECTIONS_NUM:] for rays in RAYS)
+
+
+def squares_mask(locations):
+    """Build bitmask of squares"""
+    mask = 0
+    for rank, file in locations:
+        mask |= 1 << (rank * 8 + file)
+
+    return mask
+
+
+# Bitmask versions of the tables for bitboards
+KNIGHT_MASKS = tuple(squares_mask(targets) for targets in KNIGHT_TARGETS)
+KING_MASKS = tuple(squares_mask(targets) for targets in KING_TARGETS)
+PAWN_ATTACK_MASKS = {colour: tuple(squares_mask(targets) for targets in PAWN_ATTACKS[colour])
+                     for colour in PAWN_ATTACKS}
+RAY_MASKS = tuple(tuple(squares_mask(ray) for ray in rays) for rays in RAYS)
+# Square index grows along the ray, so the nearest piece is the lowest bit
+POSITIVE_DIRECTIONS = tuple(rank_step * 8 + file_step > 0 for rank_step, file_step in DIRECTIONS)
+# Directions of sliding pieces by kind
+SLIDING_DIRECTIONS = {BISHOP: range(ORTHOGONAL_DIRECTIONS_NUM, len(DIRECTIONS)),
+                      ROOK: range(ORTHOGONAL_DIRECTIONS_NUM),
+                      QUEEN: range(len(DIRECTIONS))}
+
+
+def sliding_attacks(square, occupied, directions):
+    """Build bitmask of squares attacked from square along given directions, rays stop at occupied squares"""
+    attacks = 0
+    rays = RAY_MASKS[square]
+    for direction in directions:
+        ray = rays[direction]
+        blockers = ray & occupied
+        if blockers:
+            if POSITIVE_DIRECTIONS[direction]:
+                nearest = (blockers & -blockers).bit_length() - 1
+            else:
+                nearest = blockers.bit_length() - 1
+            # Squares behind the nearest piece are cut off
+            ray ^= RAY_MASKS[nearest][direction]
+        attacks |= ray
+
+    return attacks
+
+
+def is_attacked(board, square, colour):
+    """Check if square is attacked by any piece of given colour"""
+    rank, file = square
+    index = rank * 8 + file
+
+    # Pawns attack square from squares pawn of other colour would attack
+    defender_colour = "black" if colour == "white" else "white"
+    for location in PAWN_ATTACKS[defender_colour][index]:
+        piece = board.get_piece(location)
+        if piece is not None and piece.kind == PAWN and piece.get_colour() == colour:
+            return True
+
+    for location in KNIGHT_TARGETS[index]:
+        piece = board.get_piece(location)
+        if piece is not None and piece.kind == KNIGHT and piece.get_colour() == colour:
+            return True
+
+    for location in KING_TARGETS[index]:
+        piece = board.get_piece(location)
+        if piece is not None and piece.kind == KING and piece.get_colour() == colour:
+            return True
+
+    # Only the first piece on each ray can attack
+    for direction, ray in enumerate(RAYS[index]):
+        sliding_kind = ROOK if direction < ORTHOGONAL_DIRECTIONS_NUM else BISHOP
+        for location in ray:
+            piece = board.get_piece(location)
+            if piece is not None:
+                if piece.get_colour() == colour and (piece.kind == sliding_kind or piece.kind == QUEEN):
+                    return True
+                break
+
+    return False
+
+
+def least_valuable_attacker(board, square, colour, removed):
+    """Get location and piece of the cheapest piece of given colour attacking square, ignoring removed squares"""
+    rank, file = square
+    index = rank * 8 + file
+
+    defender_colour = "black" if colour == "white" else "white"
+    for location in PAWN_ATTACKS[defender_colour][index]:
+        piece = board.get_piece(location)
+        if piece is not None and piece.kind == PAWN and piece.get_colour() == colour and location not in removed:
+            return location, piece
+
+    for location in KNIGHT_TARGETS[index]:
+        piece = board.get_piece(location)
+        if piece is not None and piece.kind == KNIGHT and piece.get_colour() == colour and location not in removed:
+            return location, piece
+
+    # Sliding pieces behind removed ones attack through them
+    sliding_attackers = {}
+    for direction, ray in enumerate(RAYS[index]):
+        sliding_kind = ROOK if direction < ORTHOGONAL_DIRECTIONS_NUM else BISHOP
+        for location in ray:
+            if location in removed:
+                continue
+            piece = board.get_piece(location)
+            if piece is not None:
+                if piece.get_colour() == colour and (piece.kind == sliding_kind or piece.kind == QUEEN):
+                    sliding_attackers.setdefault(piece.kind, (location, piece))
+                break
+
+    for kind in (BISHOP, ROOK, QUEEN):
+        if kind in sliding_attackers:
+            return sliding_attackers[kind]
+
+    for location in KING_TARGETS[index]:
+        piece = board.get_piece(location)
+        if piece is not None and piece.kind == KING and piece.get_colour() == colour and location not in removed:
+            return location, piece
+
+    return None
@@ -0,0 +1,123 @@
+import numpy as np
+
+from AttackTables import SQUARES
+from Board import Board, START_FEN
+from ChessEnv import ChessEnv, ACTIONS_NUM, PIECE_PLANES_NUM
+from Move import KING_CASTLE, QUEEN_CASTLE, UN_PASSANT_CAPTURE, from_square, to_square, get_flags
+from PiecesCollection import PiecesCollection
+from Zobrist import CASTLING_RIGHTS_NUM
+
+
+class BatchChessEnv:
+    def __init__(self, envs_num, board_type=Board, max_plies=None):
+        self.envs_num = envs_num
+        pieces = PiecesCollection()
+        pieces.initialize_pieces()
+
+        # Piece planes by piece index with rank 1 first, side to move is 0 for white and 1 for black,
+        # castling rights in order white king side, white queen side, black king side, black queen side
+        # and one-hot file of un passant square
+        self.piece_planes = np.zeros((envs_num, PIECE_PLANES_NUM, 8, 8), dtype=np.uint8)
+        self.side_to_move = np.zeros(envs_num, dtype=np.uint8)
+        self.castling = np.zeros((envs_num, CASTLING_RIGHTS_NUM), dtype=np.uint8)
+        self.un_passant = np.zeros((envs_num, 8), dtype=np.uint8)
+        self.masks = np.zeros((envs_num, ACTIONS_NUM), dtype=np.uint8)
+        self.rewards = np.zeros(envs_num, dtype=np.float32)
+        self.dones = np.zeros(envs_num, dtype=bool)
+
+        # Flat view of planes to update squares by index
+        self.square_planes = self.piece_planes.reshape(envs_num, PIECE_PLANES_NUM, 64)
+
+        # Environments write legal action masks straight into their rows
+        self.envs = [ChessEnv(board_type, max_plies, pieces, self.masks[row].data) for row in range(envs_num)]
+        self.start_fen = START_FEN
+
+    def reset(self, fen=START_FEN):
+        """Start all games from given position and get observations"""
+        self.start_fen = fen
+        for row in range(self.envs_num):
+            self.__reset_env(row)
+        self.rewards[:] = 0.0
+        self.dones[:] = False
+
+        return self.observations()
+
+    def step(self, actions):
+        """Make one move in every game. Get observations, rewards of sides which moved, done flags and infos.
+        Finished games start again, their observations show the new game and infos keep the result.
+        No game is stepped if any action is illegal"""
+        if len(actions) != self.envs_num:
+            raise ValueError("expected {} actions, got {}".format(self.envs_num, len(actions)))
+
+        actions = [int(action) for action in actions]
+        encoded_moves = []
+        for row, action in enumerate(actions):
+            env = self.envs[row]
+            if env.done:
+                raise RuntimeError("game in row {} is over, reset the environment".format(row))
+            encoded_move = env.legal_actions.get(action)
+            if encoded_move is None:
+                raise ValueError("illegal action {} in row {}".format(action, row))
+            encoded_moves.append(encoded_move)
+
+        infos = [None] * self.envs_num
+        for row, (action, encoded_move) in enumerate(zip(actions, encoded_moves)):
+            env = self.envs[row]
+            board, reward, done, info = env.step(action)
+            self.rewards[row] = reward
+            self.dones[row] = done
+            infos[row] = info
+
+            if done:
+                self.__reset_env(row)
+            else:
+                self.__update_move(row, encoded_move)
+
+        return self.observations(), self.rewards.copy(), self.dones.copy(), infos
+
+    def observations(self):
+        """Get copies of state arrays of all games, following steps don't change them"""
+        return {"piece_planes": self.piece_planes.copy(), "side_to_move": self.side_to_move.copy(),
+                "castling": self.castling.copy(), "un_passant": self.un_passant.copy(),
+                "action_mask": self.masks.copy()}
+
+    def __reset_env(self, row):
+        """Restart game and write its whole state"""
+        env = self.envs[row]
+        env.reset(self.start_fen)
+
+        self.square_planes[row] = 0
+        for square, piece_index in enumerate(env.board.piece_indexes()):
+            if piece_index:
+                self.square_planes[row, piece_index - 1, square] = 1
+        self.__update_state(row)
+
+    def __update_move(self, row, encoded_move):
+        """Rewrite only squares changed by the move"""
+        location, move, flags = from_square(encoded_move), to_square(encoded_move), get_flags(encoded_move)
+        squares = [location, move]
+        if flags == UN_PASSANT_CAPTURE:
+            # Taken pawn stands next to the moving one
+            squares.append((location & ~7) | (move & 7))
+        elif flags == KING_CASTLE or flags == QUEEN_CASTLE:
+            rook_squares = Board.castling_rook_squares(SQUARES[move])
+            squares.extend(rank * 8 + file for rank, file in rook_squares)
+
+        board = self.envs[row].board
+        for square in squares:
+            self.square_planes[row, :, square] = 0
+            piece = board.get_piece(SQUARES[square])
+            if piece is not None:
+                self.square_planes[row, piece.get_index(), square] = 1
+        self.__update_state(row)
+
+    def __update_state(self, row):
+        """Write side to move, castling rights and un passant file"""
+        board = self.envs[row].board
+        self.side_to_move[row] = board.current_colour() != "white"
+        castling_rights = board.get_castling_rights()
+        for index in range(CASTLING_RIGHTS_NUM):
+            self.castling[row, index] = castling_rights >> index & 1
+        self.un_passant[row] = 0
+        if board.get_un_passant_attack() is not None:
+            self.un_passant[row, board.get_un_passant_attack()[1]] = 1
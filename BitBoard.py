@@ -0,0 +1,311 @@
+from array import array
+
+from AttackTables import SQUARES, KNIGHT_MASKS, KING_MASKS, PAWN_ATTACK_MASKS, RAY_MASKS, POSITIVE_DIRECTIONS, \
+    ORTHOGONAL_DIRECTIONS_NUM, SLIDING_DIRECTIONS, sliding_attacks
+from Board import Board
+from Move import QUIET, DOUBLE_PAWN_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, UN_PASSANT_CAPTURE, PROMOTION, \
+    PROMOTION_CAPTURE
+from Piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, KINDS_NUM
+from Zobrist import CASTLING
+
+ALL_SQUARES = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_8 = RANK_1 << 56
+# Square a pawn double push passes over, third rank of its colour
+PAWN_PASS_RANKS = {"white": RANK_1 << 16, "black": RANK_1 << 40}
+
+
+class BitBoard(Board):
+    def __init__(self):
+        super().__init__()
+
+        # Pieces are stored in bitboards instead of list of ranks
+        self.locations = None
+
+        # One bitboard per piece kind and colour
+        self.bitboards = [0] * (2 * KINDS_NUM)
+        # Occupancy masks
+        self.occupancy = {"white": 0, "black": 0}
+        self.occupied = 0
+        # Squares with pieces which haven't moved yet
+        self.unmoved = 0
+        # Piece by square index beside bitboards, so single squares are read at once
+        self.square_pieces = [None] * 64
+
+    def get_piece(self, location):
+        """Get piece by its location"""
+        rank, file = location
+        return self.square_pieces[rank * 8 + file]
+
+    def is_attacked(self, square, colour):
+        """Check if square is attacked by any piece of given colour, using occupancy masks"""
+        rank, file = square
+        index = rank * 8 + file
+        bitboards = self.bitboards
+        offset = 0 if colour == "white" else KINDS_NUM
+
+        # Pawns attack square from squares pawn of other colour would attack
+        defender_colour = "black" if colour == "white" else "white"
+        if PAWN_ATTACK_MASKS[defender_colour][index] & bitboards[offset + PAWN] or \
+           KNIGHT_MASKS[index] & bitboards[offset + KNIGHT] or KING_MASKS[index] & bitboards[offset + KING]:
+            return True
+
+        # Only the nearest piece on each ray can attack
+        queens = bitboards[offset + QUEEN]
+        orthogonal_sliders = bitboards[offset + ROOK] | queens
+        diagonal_sliders = bitboards[offset + BISHOP] | queens
+        for direction, ray_mask in enumerate(RAY_MASKS[index]):
+            sliders = orthogonal_sliders if direction < ORTHOGONAL_DIRECTIONS_NUM else diagonal_sliders
+            if not ray_mask & sliders:
+                continue
+            blockers = ray_mask & self.occupied
+            if POSITIVE_DIRECTIONS[direction]:
+                nearest = blockers & -blockers
+            else:
+                nearest = 1 << (blockers.bit_length() - 1)
+            if nearest & sliders:
+                return True
+
+        return False
+
+    def generate_legal_moves(self):
+        """Generate encoded legal moves of side to move set-wise from bitboards and attack masks"""
+        legal_moves = array('H')
+        colour = self.side_to_move
+        opponent = "black" if colour == "white" else "white"
+        offset = 0 if colour == "white" else KINDS_NUM
+        opponent_offset = KINDS_NUM - offset
+        bitboards = self.bitboards
+        own = self.occupancy[colour]
+        enemy = self.occupancy[opponent]
+        occupied = self.occupied
+
+        king_rank, king_file = self.king_location[colour]
+        king_square = king_rank * 8 + king_file
+
+        # Checking pieces and squares which stop their checks
+        checkers = PAWN_ATTACK_MASKS[colour][king_square] & bitboards[opponent_offset + PAWN] | \
+            KNIGHT_MASKS[king_square] & bitboards[opponent_offset + KNIGHT]
+        checks_num = bin(checkers).count("1")
+        check_mask = checkers
+        # Squares pinned piece can move to, by its square
+        pins = {}
+        pinned = 0
+        queens = bitboards[opponent_offset + QUEEN]
+        orthogonal_sliders = bitboards[opponent_offset + ROOK] | queens
+        diagonal_sliders = bitboards[opponent_offset + BISHOP] | queens
+        king_rays = RAY_MASKS[king_square]
+        for direction, ray in enumerate(king_rays):
+            sliders = orthogonal_sliders if direction < ORTHOGONAL_DIRECTIONS_NUM else diagonal_sliders
+            if not ray & sliders:
+                continue
+            positive = POSITIVE_DIRECTIONS[direction]
+            blockers = ray & occupied
+            nearest = blockers & -blockers if positive else 1 << (blockers.bit_length() - 1)
+            nearest_square = nearest.bit_length() - 1
+            if nearest & sliders:
+                checks_num += 1
+                check_mask |= ray ^ RAY_MASKS[nearest_square][direction]
+            elif nearest & own:
+                # Own piece is pinned if opponent slider stands right behind it
+                blockers ^= nearest
+                if blockers:
+                    behind = blockers & -blockers if positive else 1 << (blockers.bit_length() - 1)
+                    if behind & sliders:
+                        pins[nearest_square] = ray ^ RAY_MASKS[behind.bit_length() - 1][direction]
+                        pinned |= nearest
+
+        king_targets = KING_MASKS[king_square] & ~own
+        if checks_num < 2:
+            # Other pieces can only take the only checking piece or block it
+            targets = ~own & ALL_SQUARES if not checks_num else check_mask
+
+            self.__add_pawn_moves(legal_moves, colour, bitboards[offset + PAWN], enemy, occupied, targets, pinned,
+                                  pins)
+
+            for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+                pieces = bitboards[offset + kind]
+                while pieces:
+                    bit = pieces & -pieces
+                    pieces ^= bit
+                    square = bit.bit_length() - 1
+                    if kind == KNIGHT:
+                        # Pinned knight can't stay on the pin
+                        if bit & pinned:
+                            continue
+                        moves = KNIGHT_MASKS[square] & targets
+                    else:
+                        moves = sliding_attacks(square, occupied, SLIDING_DIRECTIONS[kind]) & targets
+                        if bit & pinned:
+                            moves &= pins[square]
+                    self.__add_moves(legal_moves, square, moves, enemy)
+
+        # King can't step on attacked square, lift it so it doesn't hide squares behind it
+        self.occupied = occupied ^ (1 << king_square)
+        king_moves = 0
+        while king_targets:
+            bit = king_targets & -king_targets
+            king_targets ^= bit
+            if not self.is_attacked(SQUARES[bit.bit_length() - 1], opponent):
+                king_moves |= bit
+        self.occupied = occupied
+        self.__add_moves(legal_moves, king_square, king_moves, enemy)
+
+        # Castling is not possible when in check
+        if not checks_num:
+            self.__add_castling(legal_moves, king_square, opponent)
+
+        return legal_moves
+
+    def __add_pawn_moves(self, legal_moves, colour, pawns, enemy, occupied, targets, pinned, pins):
+        """Add pushes and captures of pawns, unpinned pawns move all at once by shifting their bitboard"""
+        empty = ~occupied & ALL_SQUARES
+        free_pawns = pawns & ~pinned
+        if colour == "white":
+            single_pushes = free_pawns << 8 & empty
+            double_pushes = (single_pushes & PAWN_PASS_RANKS[colour]) << 8 & empty & targets
+            shifted_moves = ((single_pushes & targets, 8, QUIET), (double_pushes, 16, DOUBLE_PAWN_PUSH),
+                             ((free_pawns & ~FILE_A) << 7 & enemy & targets, 7, CAPTURE),
+                             ((free_pawns & ~FILE_H) << 9 & enemy & targets, 9, CAPTURE))
+        else:
+            single_pushes = free_pawns >> 8 & empty
+            double_pushes = (single_pushes & PAWN_PASS_RANKS[colour]) >> 8 & empty & targets
+            shifted_moves = ((single_pushes & targets, -8, QUIET), (double_pushes, -16, DOUBLE_PAWN_PUSH),
+                             ((free_pawns & ~FILE_A) >> 9 & enemy & targets, -9, CAPTURE),
+                             ((free_pawns & ~FILE_H) >> 7 & enemy & targets, -7, CAPTURE))
+
+        for moves, shift, flags in shifted_moves:
+            while moves:
+                bit = moves & -moves
+                moves ^= bit
+                move = bit.bit_length() - 1
+                self.__add_pawn_move(legal_moves, move - shift, move, flags, bit)
+
+        # Pinned pawns move one by one along their pins
+        pinned_pawns = pawns & pinned
+        step = 8 if colour == "white" else -8
+        while pinned_pawns:
+            bit = pinned_pawns & -pinned_pawns
+            pinned_pawns ^= bit
+            square = bit.bit_length() - 1
+            pin = pins[square] & targets
+            push = 1 << (square + step)
+            if push & empty:
+                if push & pin:
+                    self.__add_pawn_move(legal_moves, square, square + step, QUIET, push)
+                double_push = 1 << (square + 2 * step)
+                if push & PAWN_PASS_RANKS[colour] and double_push & empty & pin:
+                    legal_moves.append(square | (square + 2 * step) << 6 | DOUBLE_PAWN_PUSH << 12)
+            captures = PAWN_ATTACK_MASKS[colour][square] & enemy & pin
+            while captures:
+                capture = captures & -captures
+                captures ^= capture
+                self.__add_pawn_move(legal_moves, square, capture.bit_length() - 1, CAPTURE, capture)
+
+        # Un passant take removes pawn from another square, so it is checked on the board
+        if self.un_passant_attack is not None:
+            rank, file = self.un_passant_attack
+            un_passant_square = rank * 8 + file
+            opponent = "black" if colour == "white" else "white"
+            attackers = PAWN_ATTACK_MASKS[opponent][un_passant_square] & pawns
+            while attackers:
+                bit = attackers & -attackers
+                attackers ^= bit
+                square = bit.bit_length() - 1
+                if self.__move_legal(SQUARES[square], self.un_passant_attack):
+                    legal_moves.append(square | un_passant_square << 6 | UN_PASSANT_CAPTURE << 12)
+
+    @staticmethod
+    def __add_pawn_move(legal_moves, square, move, flags, bit):
+        """Add pawn move, pawn reaching last rank can be promoted to one of four pieces"""
+        if bit & (RANK_1 | RANK_8):
+            flags = PROMOTION_CAPTURE if flags == CAPTURE else PROMOTION
+            for promotion_index in range(4):
+                legal_moves.append(square | move << 6 | (flags | promotion_index) << 12)
+        else:
+            legal_moves.append(square | move << 6 | flags << 12)
+
+    @staticmethod
+    def __add_moves(legal_moves, square, moves, enemy):
+        """Add captures and then quiet moves of piece to squares of bitmask"""
+        for move_squares, flags in ((moves & enemy, CAPTURE), (moves & ~enemy, QUIET)):
+            while move_squares:
+                bit = move_squares & -move_squares
+                move_squares ^= bit
+                legal_moves.append(square | (bit.bit_length() - 1) << 6 | flags << 12)
+
+    def __add_castling(self, legal_moves, king_square, opponent):
+        """Add castling moves allowed by castling rights, king can't pass or land on attacked square"""
+        for castling_right, (king_rank, king_file), (rook_rank, rook_file) in CASTLING:
+            if not self.castling_rights & castling_right or king_rank * 8 + king_file != king_square:
+                continue
+            # Squares between king and rook are empty
+            between = sum(1 << (king_square + file - king_file) for file in range(min(king_file, rook_file) + 1,
+                                                                                 max(king_file, rook_file)))
+            if between & self.occupied:
+                continue
+            step = 1 if rook_file > king_file else -1
+            if self.is_attacked((king_rank, king_file + step), opponent) or \
+               self.is_attacked((king_rank, king_file + 2 * step), opponent):
+                continue
+            flags = KING_CASTLE if step > 0 else QUEEN_CASTLE
+            legal_moves.append(king_square | (king_square + 2 * step) << 6 | flags << 12)
+
+    def __move_legal(self, location, move):
+        """Check if move doesn't leave own king in check by making it on the board"""
+        self.make_move(location, move)
+        legal = not self.is_attacked(self.king_location_by_colour(self.opposite_colour()), self.current_colour())
+        self.unmake_move()
+
+        return legal
+
+    def _store_piece(self, piece, location, previous_piece):
+        """Write piece to bitboards, previous piece is the one being replaced"""
+        rank, file = location
+        square = rank * 8 + file
+        bit = 1 << square
+        self.square_pieces[square] = piece
+
+        # Remove previous piece
+        if previous_piece is not None:
+            self.bitboards[previous_piece.get_index()] ^= bit
+            self.occupancy[previous_piece.get_colour()] ^= bit
+            self.occupied ^= bit
+            self.unmoved &= ~bit
+
+        # Add new piece
+        if piece is not None:
+            self.bitboards[piece.get_index()] |= bit
+            self.occupancy[piece.get_colour()] |= bit
+            self.occupied |= bit
+            if not piece.is_moved():
+                self.unmoved |= bit
+
+    def piece_locations(self, colour):
+        """Get locations and pieces of given colour"""
+        piece_locations = []
+        first_index = 0 if colour == "white" else KINDS_NUM
+        for index in range(first_index, first_index + KINDS_NUM):
+            bitboard = self.bitboards[index]
+            # Iterate set bits from the lowest one
+            while bitboard:
+                bit = bitboard & -bitboard
+                bitboard ^= bit
+                square = SQUARES[bit.bit_length() - 1]
+                piece_locations.append((square, self.pieces.get_by_index(index, not self.unmoved & bit)))
+
+        return piece_locations
+
+    def piece_indexes(self):
+        """Get piece index + 1 by square index, 0 for empty square"""
+        return [piece.get_index() + 1 if piece is not None else 0 for piece in self.square_pieces]
+
+    def _copy_squares(self, board_copy):
+        """Copy bitboards to another board"""
+        board_copy.bitboards = self.bitboards.copy()
+        board_copy.occupancy = self.occupancy.copy()
+        board_copy.occupied = self.occupied
+        board_copy.unmoved = self.unmoved
+        board_copy.square_pieces = self.square_pieces.copy()
@@ -1,4 +1,43 @@
 import Piece
+from AttackTables import is_attacked
+from Evaluation import MIDGAME_SCORES, ENDGAME_SCORES, PHASE_WEIGHTS, compute_scores, taper
+from Move import FILE_NAMES, decode_piece_moves, square_name
+from Zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, UN_PASSANT_KEYS, CASTLING, CASTLING_SQUARES
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+# Piece index by FEN symbol, white pieces are upper case
+FEN_SYMBOLS = "PNBRQKpnbrqk"
+FEN_PIECE_INDEXES = {symbol: index for index, symbol in enumerate(FEN_SYMBOLS)}
+FEN_EMPTY_SQUARES = {str(number): number for number in range(1, 9)}
+# Castling rights by FEN symbol, in order of FEN castling field
+FEN_CASTLING = (("K", CASTLING[0]), ("Q", CASTLING[1]), ("k", CASTLING[2]), ("q", CASTLING[3]))
+# King and rook squares which stay unmoved for castling rights given in FEN
+FEN_UNMOVED_SQUARES = {symbol: (king_location, rook_location)
+                       for symbol, (castling_right, king_location, rook_location) in FEN_CASTLING}
+# Start rank of pawns by piece index
+PAWN_START_RANKS = {Piece.PAWN: 1, Piece.PAWN + Piece.KINDS_NUM: 6}
+
+
+def fen_placement(piece_indexes):
+    """Get placement field of FEN from piece index + 1 by square index, 0 for empty square"""
+    ranks = []
+    for rank in range(7, -1, -1):
+        rank_placement = ""
+        empty_squares = 0
+        for square in range(rank * 8, rank * 8 + 8):
+            if not piece_indexes[square]:
+                empty_squares += 1
+                continue
+            if empty_squares:
+                rank_placement += str(empty_squares)
+                empty_squares = 0
+            rank_placement += FEN_SYMBOLS[piece_indexes[square] - 1]
+        if empty_squares:
+            rank_placement += str(empty_squares)
+        ranks.append(rank_placement)
+
+    return "/".join(ranks)
 
 
 class Board:
@@ -15,8 +54,25 @@ class Board:
         self.un_passant_victim_location = None
 
         self.side_to_move = 'white'
+        # Encoded legal moves of side to move
         self.legal_moves = None
 
+        # Records to unmake moves made on the board
+        self.undo_stack = []
+
+        # Zobrist key of position, updated on every change
+        self.key = 0
+        self.castling_rights = 0
+
+        # Plies since last capture or pawn move and number of full moves
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+
+        # Running evaluation of white, updated on every change like the key
+        self.midgame_score = 0
+        self.endgame_score = 0
+        self.phase = 0
+
     def current_colour(self):
         """Get current side to move colour"""
         return self.side_to_move
@@ -41,6 +97,8 @@ class Board:
         else:
             self.side_to_move = None
 
+        self.key ^= SIDE_KEY
+
     def set_pieces_collection(self, pieces):
         self.pieces = pieces
 
@@ -58,45 +116,139 @@ class Board:
         return on_board
 
     def configure_pieces(self):
-        """Place pieces if playing for white"""
-        # Test case
-        # self.locations[0] = [self.pieces.get_by_name("w_rook"),
-        #                      None,
-        #                      None,
-        #                      None,
-        #                      self.pieces.get_by_name("w_king"),
-        #                      None,
-        #                      None,
-        #                      self.pieces.get_by_name("w_rook")]
-
-        self.locations[0] = [self.pieces.get_by_name("w_rook"),
-                             self.pieces.get_by_name("w_knight"),
-                             self.pieces.get_by_name("w_bishop"),
-                             self.pieces.get_by_name("w_queen"),
-                             self.pieces.get_by_name("w_king"),
-                             self.pieces.get_by_name("w_bishop"),
-                             self.pieces.get_by_name("w_knight"),
-                             self.pieces.get_by_name("w_rook")]
-        self.locations[1] = [self.pieces.get_by_name("w_pawn") for _ in range(self.length())]
-        self.locations[6] = [self.pieces.get_by_name("b_pawn") for _ in range(self.length())]
-        self.locations[7] = [self.pieces.get_by_name("b_rook"),
-                             self.pieces.get_by_name("b_knight"),
-                             self.pieces.get_by_name("b_bishop"),
-                             self.pieces.get_by_name("b_queen"),
-                             self.pieces.get_by_name("b_king"),
-                             self.pieces.get_by_name("b_bishop"),
-                             self.pieces.get_by_name("b_knight"),
-                             self.pieces.get_by_name("b_rook")]
-
-        # Test case
-        # self.locations[7] = [self.pieces.get_by_name("b_rook"),
-        #                      None,
-        #                      None,
-        #                      None,
-        #                      self.pieces.get_by_name("b_king"),
-        #                      None,
-        #                      None,
-        #                      self.pieces.get_by_name("b_rook")]
+        """Place pieces in start position"""
+        self.set_fen(START_FEN)
+
+    @classmethod
+    def from_fen(cls, fen, pieces):
+        """Create board with position given in FEN, ValueError is raised for invalid FEN"""
+        board = cls()
+        board.set_pieces_collection(pieces)
+        # New board is empty, so position is placed without clearing
+        board.__place_position(board.__parse_fen(fen))
+
+        return board
+
+    def set_fen(self, fen):
+        """Replace position with one given in FEN, board stays unchanged if FEN is invalid"""
+        position = self.__parse_fen(fen)
+
+        for colour in ("white", "black"):
+            for location, piece in self.piece_locations(colour):
+                self.clear_location(location)
+        self.clear_un_passant()
+        if self.side_to_move != "white":
+            self.change_colour()
+        self.undo_stack = []
+        self.legal_moves = None
+
+        self.__place_position(position)
+
+    def __parse_fen(self, fen):
+        """Check FEN and get pieces with locations, side to move, un passant square and move counters"""
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError("FEN needs placement, side to move, castling and un passant fields: " + fen)
+        placement, side_to_move, castling, un_passant = fields[:4]
+
+        if side_to_move not in ("w", "b"):
+            raise ValueError("unknown side to move " + side_to_move + " in FEN: " + fen)
+
+        # Kings and rooks with castling rights haven't moved
+        unmoved_locations = set()
+        if castling != "-":
+            for symbol in castling:
+                if symbol not in FEN_UNMOVED_SQUARES:
+                    raise ValueError("unknown castling right " + symbol + " in FEN: " + fen)
+                unmoved_locations.update(FEN_UNMOVED_SQUARES[symbol])
+
+        get_by_index = self.pieces.get_by_index
+        ranks = placement.split("/")
+        if len(ranks) != 8:
+            raise ValueError("FEN placement needs 8 ranks: " + fen)
+        placed_pieces = []
+        kings_num = {"white": 0, "black": 0}
+        for rank_index, rank_placement in enumerate(ranks):
+            rank = 7 - rank_index
+            file = 0
+            for symbol in rank_placement:
+                index = FEN_PIECE_INDEXES.get(symbol)
+                if index is None:
+                    if symbol not in FEN_EMPTY_SQUARES:
+                        raise ValueError("unknown piece " + symbol + " in FEN: " + fen)
+                    file += FEN_EMPTY_SQUARES[symbol]
+                    continue
+                if file >= 8:
+                    raise ValueError("rank {} has more than 8 files in FEN: {}".format(rank + 1, fen))
+                kind = index % Piece.KINDS_NUM
+                location = (rank, file)
+                # Pawns on start rank haven't moved, knights, bishops and queens are always moved
+                if kind == Piece.PAWN:
+                    if rank in (0, 7):
+                        raise ValueError("pawn on first or last rank in FEN: " + fen)
+                    moved = rank != PAWN_START_RANKS[index]
+                elif kind == Piece.KING or kind == Piece.ROOK:
+                    moved = location not in unmoved_locations
+                else:
+                    moved = True
+
+                piece = get_by_index(index, moved)
+                placed_pieces.append((piece, location))
+                if kind == Piece.KING:
+                    kings_num[piece.get_colour()] += 1
+                file += 1
+
+            if file != 8:
+                raise ValueError("rank {} must have 8 files in FEN: {}".format(rank + 1, fen))
+
+        if kings_num["white"] != 1 or kings_num["black"] != 1:
+            raise ValueError("FEN needs one king of each colour: " + fen)
+
+        un_passant_location = None
+        if un_passant != "-":
+            # Square behind pawn which has just made double move of the other side
+            if len(un_passant) != 2 or un_passant[0] not in FILE_NAMES or \
+               un_passant[1] != ("6" if side_to_move == "w" else "3"):
+                raise ValueError("invalid un passant square " + un_passant + " in FEN: " + fen)
+            un_passant_location = (int(un_passant[1]) - 1, FILE_NAMES.index(un_passant[0]))
+
+        counters = fields[4:6]
+        if not all(counter.isdigit() for counter in counters):
+            raise ValueError("move counters must be numbers in FEN: " + fen)
+        halfmove_clock = int(counters[0]) if len(counters) > 0 else 0
+        fullmove_number = int(counters[1]) if len(counters) > 1 else 1
+
+        return placed_pieces, side_to_move == "b", un_passant_location, halfmove_clock, fullmove_number
+
+    def __place_position(self, position):
+        """Set up parsed FEN position on empty board"""
+        placed_pieces, black_to_move, un_passant_location, halfmove_clock, fullmove_number = position
+
+        for piece, location in placed_pieces:
+            self.set_piece(piece, location)
+            if self.pieces.is_king(piece):
+                self.king_location[piece.get_colour()] = location
+
+        if black_to_move:
+            self.change_colour()
+
+        if un_passant_location is not None:
+            rank, file = un_passant_location
+            # Pawn which made double move stands in front of the square
+            victim_rank = rank + 1 if rank == 2 else rank - 1
+            self.set_un_passant(un_passant_location, (victim_rank, file))
+
+        self.halfmove_clock = halfmove_clock
+        self.fullmove_number = fullmove_number
+
+    def to_fen(self):
+        """Get position in FEN"""
+        castling = "".join(symbol for symbol, (castling_right, king_location, rook_location) in FEN_CASTLING
+                           if self.castling_rights & castling_right) or "-"
+        un_passant = square_name(self.un_passant_attack) if self.un_passant_attack is not None else "-"
+
+        return "{} {} {} {} {} {}".format(fen_placement(self.piece_indexes()), self.side_to_move[0], castling, un_passant,
+                                          self.halfmove_clock, self.fullmove_number)
 
     def get_piece(self, location) -> Piece:
         """Get piece by its location"""
@@ -104,16 +256,45 @@ class Board:
         piece = self.locations[rank][file]
         return piece
 
-    def place_piece(self, piece, location):
-        """Place piece on square"""
+    def set_piece(self, piece, location):
+        """Put piece instance on square as it is"""
+        previous_piece = self.get_piece(location)
         rank, file = location
+        square = rank * 8 + file
+
+        # Update position key and evaluation
+        if previous_piece is not None:
+            index = previous_piece.get_index()
+            self.key ^= PIECE_KEYS[index][square]
+            self.midgame_score -= MIDGAME_SCORES[index][square]
+            self.endgame_score -= ENDGAME_SCORES[index][square]
+            self.phase -= PHASE_WEIGHTS[previous_piece.kind]
+        if piece is not None:
+            index = piece.get_index()
+            self.key ^= PIECE_KEYS[index][square]
+            self.midgame_score += MIDGAME_SCORES[index][square]
+            self.endgame_score += ENDGAME_SCORES[index][square]
+            self.phase += PHASE_WEIGHTS[piece.kind]
+
+        self._store_piece(piece, location, previous_piece)
+
+        # Castling rights depend on kings and rooks staying unmoved
+        if square in CASTLING_SQUARES:
+            self.__update_castling_rights()
+
+    def _store_piece(self, piece, location, previous_piece):
+        """Write piece to square storage, previous piece is the one being replaced"""
+        rank, file = location
+        self.locations[rank][file] = piece
 
+    def place_piece(self, piece, location):
+        """Place piece on square"""
         # If piece moved fo the first time
         if not piece.is_moved():
             # place moved instance instead
             piece = self.pieces.get_moved_version(piece)
 
-        self.locations[rank][file] = piece
+        self.set_piece(piece, location)
 
     def update_parameters(self, piece, location):
         """Update board parameters"""
@@ -131,18 +312,57 @@ class Board:
 
     def clear_location(self, location):
         """Clear square"""
-        rank, file = location
-        self.locations[rank][file] = None
+        self.set_piece(None, location)
+
+    def is_attacked(self, square, colour):
+        """Check if square is attacked by any piece of given colour"""
+        return is_attacked(self, square, colour)
+
+    def piece_locations(self, colour):
+        """Get locations and pieces of given colour"""
+        piece_locations = []
+        for rank in range(self.SQUARES_NUM):
+            for file, piece in enumerate(self.locations[rank]):
+                if piece is not None and piece.get_colour() == colour:
+                    piece_locations.append(((rank, file), piece))
+
+        return piece_locations
+
+    def piece_indexes(self):
+        """Get piece index + 1 by square index, 0 for empty square"""
+        return [piece.get_index() + 1 if piece is not None else 0 for rank in self.locations for piece in rank]
+
+    def __update_castling_rights(self):
+        """Compute castling rights from unmoved kings and rooks"""
+        castling_rights = 0
+        for castling_right, king_location, rook_location in CASTLING:
+            king = self.get_piece(king_location)
+            rook = self.get_piece(rook_location)
+            if king is not None and self.pieces.is_king(king) and not king.is_moved() and \
+               rook is not None and self.pieces.is_rook(rook) and not rook.is_moved():
+                castling_rights |= castling_right
+
+        # Replace key of previous rights
+        self.key ^= CASTLING_KEYS[self.castling_rights] ^ CASTLING_KEYS[castling_rights]
+        self.castling_rights = castling_rights
+
+    def get_castling_rights(self):
+        return self.castling_rights
 
     def set_un_passant(self, location, victim_location):
         """Set un passant parameters"""
+        # Replace key of previous un passant file
+        if self.un_passant_attack is not None:
+            self.key ^= UN_PASSANT_KEYS[self.un_passant_attack[1]]
+        if location is not None:
+            self.key ^= UN_PASSANT_KEYS[location[1]]
+
         self.un_passant_attack = location
         self.un_passant_victim_location = victim_location
 
     def clear_un_passant(self):
         """Clear un passant parameters"""
-        self.un_passant_attack = None
-        self.un_passant_victim_location = None
+        self.set_un_passant(None, None)
 
     def get_un_passant_attack(self):
         return self.un_passant_attack
@@ -150,31 +370,163 @@ class Board:
     def get_un_passant_victim_location(self):
         return self.un_passant_victim_location
 
+    def make_move(self, location, move, promotion=None):
+        """Make move on the board and save record to unmake it"""
+        piece = self.get_piece(location)
+        captured_piece = self.get_piece(move)
+        captured_location = move
+        castling_rook = None
+
+        # Pawn taking un passant removes piece from another square
+        if move == self.un_passant_attack and self.pieces.is_pawn(piece):
+            captured_location = self.un_passant_victim_location
+            captured_piece = self.get_piece(captured_location)
+
+        # King moving two squares castles
+        elif self.pieces.is_king(piece) and abs(location[1] - move[1]) == 2:
+            rook_location, rook_move = self.castling_rook_squares(move)
+            castling_rook = self.get_piece(rook_location)
+
+        self.undo_stack.append((location, move, piece, captured_piece, captured_location, castling_rook,
+                                self.un_passant_attack, self.un_passant_victim_location, self.halfmove_clock))
+
+        # Captures and pawn moves reset fifty-move counter
+        if captured_piece is not None or self.pieces.is_pawn(piece):
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if self.side_to_move == "black":
+            self.fullmove_number += 1
+
+        # Place piece or piece pawn is promoted to
+        self.place_piece(piece if promotion is None else promotion, move)
+
+        #  and get flag if un passant will be available
+        consider_un_passant = self.update_parameters(piece, move)
+        self.clear_location(location)
+        if captured_location != move:
+            self.clear_location(captured_location)
+
+        # If pawn have made double forward move
+        if consider_un_passant and abs(location[0] - move[0]) == 2:
+            # Save un passant square and piece for take
+            self.set_un_passant(((location[0] + move[0]) // 2, move[1]), move)
+        else:
+            # Delete un passant squares
+            self.clear_un_passant()
+
+        # Move rook when castling
+        if castling_rook is not None:
+            self.place_piece(castling_rook, rook_move)
+            self.clear_location(rook_location)
+
+        self.change_colour()
+
+    def unmake_move(self):
+        """Restore board state before the last made move"""
+        location, move, piece, captured_piece, captured_location, castling_rook, \
+            un_passant_attack, un_passant_victim_location, halfmove_clock = self.undo_stack.pop()
+
+        self.change_colour()
+        self.halfmove_clock = halfmove_clock
+        if self.side_to_move == "black":
+            self.fullmove_number -= 1
+
+        # Return rook when castling
+        if castling_rook is not None:
+            rook_location, rook_move = self.castling_rook_squares(move)
+            self.clear_location(rook_move)
+            self.set_piece(castling_rook, rook_location)
+
+        # Return moved piece as it was and captured piece
+        self.clear_location(move)
+        self.set_piece(captured_piece, captured_location)
+        self.set_piece(piece, location)
+
+        if self.pieces.is_king(piece):
+            self.king_location[piece.get_colour()] = location
+
+        self.set_un_passant(un_passant_attack, un_passant_victim_location)
+
+    @staticmethod
+    def castling_rook_squares(move):
+        """Get rook location and move when king castles to given square"""
+        # king side castling
+        if move[1] == 6:
+            rook_location = (move[0], 7)
+            rook_move = (move[0], 5)
+        # queen side castling
+        else:
+            rook_location = (move[0], 0)
+            rook_move = (move[0], 3)
+
+        return rook_location, rook_move
+
     def copy(self):
         """Returns copy of the board"""
-        board_copy = Board()
+        board_copy = self.__class__()
 
         # Copy pieces locations and un passant attack square
-        board_copy.locations = []
-        for rank in self.locations:
-            board_copy.locations.append(rank.copy())
+        self._copy_squares(board_copy)
 
         board_copy.un_passant_attack = self.un_passant_attack
         board_copy.un_passant_victim_location = self.un_passant_victim_location
         board_copy.king_location = self.king_location.copy()
         board_copy.side_to_move = self.side_to_move
+        board_copy.key = self.key
+        board_copy.castling_rights = self.castling_rights
+        board_copy.halfmove_clock = self.halfmove_clock
+        board_copy.fullmove_number = self.fullmove_number
+        board_copy.midgame_score = self.midgame_score
+        board_copy.endgame_score = self.endgame_score
+        board_copy.phase = self.phase
 
         # Dictionary with pieces stay the same for optimization
         board_copy.pieces = self.pieces
 
         return board_copy
 
+    def _copy_squares(self, board_copy):
+        """Copy square storage to another board"""
+        board_copy.locations = []
+        for rank in self.locations:
+            board_copy.locations.append(rank.copy())
+
+    def hash(self):
+        """Get Zobrist key of position"""
+        return self.key
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.key == other.key
+
+    def __hash__(self):
+        return self.key
+
+    def evaluate(self):
+        """Get running evaluation from side to move point of view"""
+        score = taper(self.midgame_score, self.endgame_score, self.phase)
+        return score if self.side_to_move == "white" else -score
+
+    def refresh_evaluation(self):
+        """Recompute running evaluation, e.g. after loading new evaluation tables"""
+        self.midgame_score, self.endgame_score, self.phase = compute_scores(self)
+
     def king_location_by_colour(self, king_colour):
         return self.king_location[king_colour]
 
     def set_legal_moves(self, legal_moves):
-        self.legal_moves = legal_moves.copy()
+        self.legal_moves = legal_moves
+
+    def has_legal_move(self):
+        return len(self.legal_moves) > 0
+
+    def legal_move_count(self):
+        return len(self.legal_moves)
+
+    def is_mate(self):
+        """Check if side to move has no legal moves"""
+        return not self.has_legal_move()
 
     def get_piece_legal_moves(self, location):
-        rank, file = location
-        return self.legal_moves[rank][file]
+        """Get attacking and position moves of piece, None if it can't move"""
+        return decode_piece_moves(self.legal_moves, location)
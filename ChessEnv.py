@@ -0,0 +1,141 @@
+from Board import Board, START_FEN
+from Engine import Engine
+from Move import UN_PASSANT_CAPTURE, is_promotion, promotion_index, get_flags
+from Piece import KINDS_NUM
+from PiecesCollection import PiecesCollection
+from Zobrist import UN_PASSANT_KEYS
+
+# Action is from square + to square * 64 + 4096 * promotion, where promotion is 0 for other moves
+# and 1 + index of promotion piece: knight, bishop, rook, queen
+ACTIONS_NUM = 5 * 4096
+# Observations have one plane of each piece kind and colour
+PIECE_PLANES_NUM = KINDS_NUM * 2
+
+# Halfmove clock value of fifty-move rule draw
+FIFTY_MOVES_PLIES = 100
+REPETITIONS_NUM = 3
+
+WHITE_WIN = "1-0"
+BLACK_WIN = "0-1"
+DRAW = "1/2-1/2"
+
+
+def move_to_action(encoded_move):
+    """Get action of encoded move"""
+    action = encoded_move & 4095
+    if is_promotion(encoded_move):
+        action += 4096 * (1 + promotion_index(encoded_move))
+
+    return action
+
+
+class ChessEnv:
+    def __init__(self, board_type=Board, max_plies=None, pieces=None, mask=None):
+        if pieces is None:
+            pieces = PiecesCollection()
+            pieces.initialize_pieces()
+        self.pieces = pieces
+        self.board_type = board_type
+        # Game is cut off as a draw after this many plies, None for no limit
+        self.max_plies = max_plies
+
+        # Observation returned by reset and step is this board itself, not a copy.
+        # The next step changes it in place, copy the board to keep the position
+        self.board = board_type.from_fen(START_FEN, pieces)
+        self.engine = Engine(self.board, pieces, None)
+
+        # Legal moves by action and mask with ones for legal actions.
+        # Mask can be any writable buffer of ACTIONS_NUM bytes, e.g. row of batch array
+        self.legal_actions = {}
+        self.mask = mask if mask is not None else bytearray(ACTIONS_NUM)
+
+        # Position keys seen in the game with their counts, for repetition
+        self.key_counts = {}
+        self.plies = 0
+        self.done = False
+        self.result = None
+
+    def reset(self, fen=START_FEN):
+        """Start new game from given position and get observation, the board changed in place by next steps"""
+        self.board.set_fen(fen)
+        self.plies = 0
+        self.done = False
+        self.result = None
+        self.__update_legal_actions()
+        key = self.__repetition_key()
+        self.key_counts = {key: 1}
+
+        # Position can already be over
+        self.done, self.result, reason = self.__game_over(key)
+
+        return self.board
+
+    def step(self, action):
+        """Make move of action for side to move. Get observation, reward of side which moved, done flag
+        and info with result and its reason. Observation is the board changed in place by next steps"""
+        if self.done:
+            raise RuntimeError("game is over, reset the environment")
+
+        encoded_move = self.legal_actions.get(action)
+        if encoded_move is None:
+            raise ValueError("illegal action {}".format(action))
+
+        colour = self.board.current_colour()
+        self.engine.make_move(self.board, encoded_move)
+        self.plies += 1
+        self.__update_legal_actions()
+        key = self.__repetition_key()
+        self.key_counts[key] = self.key_counts.get(key, 0) + 1
+
+        self.done, self.result, reason = self.__game_over(key)
+        if self.result in (WHITE_WIN, BLACK_WIN):
+            reward = 1.0 if (self.result == WHITE_WIN) == (colour == "white") else -1.0
+        else:
+            reward = 0.0
+
+        return self.board, reward, self.done, {"result": self.result, "reason": reason}
+
+    def action_mask(self):
+        """Get mask of ACTIONS_NUM bytes with ones for legal actions, updated in place every step"""
+        return self.mask
+
+    def legal_action_list(self):
+        return list(self.legal_actions)
+
+    def __update_legal_actions(self):
+        """Compute legal moves of side to move and their actions"""
+        for action in self.legal_actions:
+            self.mask[action] = 0
+
+        self.engine.compute_legal_moves(self.board)
+        self.legal_actions = {move_to_action(encoded_move): encoded_move for encoded_move in self.board.legal_moves}
+        for action in self.legal_actions:
+            self.mask[action] = 1
+
+    def __repetition_key(self):
+        """Get key of position for repetition, un passant file counts only when the capture is legal"""
+        key = self.board.hash()
+        un_passant_attack = self.board.get_un_passant_attack()
+        if un_passant_attack is not None and \
+           not any(get_flags(encoded_move) == UN_PASSANT_CAPTURE for encoded_move in self.legal_actions.values()):
+            key ^= UN_PASSANT_KEYS[un_passant_attack[1]]
+
+        return key
+
+    def __game_over(self, key):
+        """Get done flag, result and its reason for current position with given repetition key"""
+        board = self.board
+        if not board.has_legal_move():
+            colour = board.current_colour()
+            if board.is_attacked(board.king_location_by_colour(colour), board.opposite_colour()):
+                return True, BLACK_WIN if colour == "white" else WHITE_WIN, "checkmate"
+            return True, DRAW, "stalemate"
+
+        if board.halfmove_clock >= FIFTY_MOVES_PLIES:
+            return True, DRAW, "fifty moves"
+        if self.key_counts.get(key, 0) >= REPETITIONS_NUM:
+            return True, DRAW, "repetition"
+        if self.max_plies is not None and self.plies >= self.max_plies:
+            return True, DRAW, "max plies"
+
+        return False, None, None
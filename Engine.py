@@ -1,14 +1,23 @@
-from Piece import Piece
-from itertools import product
+from array import array
+
+from AttackTables import KNIGHT_TARGETS, PAWN_ATTACKS, RAYS, ORTHOGONAL_DIRECTIONS_NUM
+from BitBoard import BitBoard
+from Piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from LegalMovesCache import LegalMovesCache
+from Move import QUIET, DOUBLE_PAWN_PUSH, KING_CASTLE, QUEEN_CASTLE, CAPTURE, UN_PASSANT_CAPTURE, PROMOTION, \
+    PROMOTION_CAPTURE, encode, decode
 
 
 class Engine:
-    def __init__(self, board, pieces, app):
+    def __init__(self, board, pieces, app, cache_capacity=10000):
         self.pieces = pieces
         self.board = board
         self.app = app
         self.ui = None
 
+        # Computed legal moves by position key
+        self.legal_moves_cache = LegalMovesCache(cache_capacity)
+
         self.promotion_location = None
         self.promotion_move = None
 
@@ -38,12 +47,11 @@ class Engine:
     def process_move(self, board, location, move):
         """Calculate move for given board and location"""
         move_done = False
-        attacking_moves, position_moves = self.board.get_piece_legal_moves(location)
-        piece_moves = attacking_moves + position_moves
-        if move in piece_moves:
+        piece_moves = self.board.get_piece_legal_moves(location)
+        if piece_moves and move in piece_moves[0] + piece_moves[1]:
             if not self.__pawn_promotion(board, location, move):
                 move_done = True
-                self.__move_piece(board, location, move)
+                board.make_move(location, move)
                 self.compute_legal_moves(self.board)
                 if self.check_mate(self.board):
                     self.ui.set_mate()
@@ -55,151 +63,173 @@ class Engine:
 
         return move_done
 
-    def __move_piece(self, board, location, move):
-        """Move piece to another square"""
-        piece = board.get_piece(location)
-
-        # Place piece
-        board.place_piece(piece, move)
-
-        #  and get flag if un passant will be available
-        consider_un_passant = board.update_parameters(piece, move)
-        board.clear_location(location)
-
-        if consider_un_passant:
-            # Save un passant square and piece for take
-            self.__compute_un_passant(board, piece, location, move)
+    def compute_legal_moves(self, board):
+        """Compute legal moves for each piece on a given board"""
+        # Position key covers castling rights and un passant as well
+        key = board.hash()
+        cached_moves = self.legal_moves_cache.get(key)
+        if cached_moves is not None:
+            board.set_legal_moves(cached_moves)
+            return
+
+        # Bitboard backend generates moves set-wise from its masks
+        if isinstance(board, BitBoard):
+            legal_moves = board.generate_legal_moves()
         else:
-            # Delete un passant squares
-            self.__clear_un_passant(board, move)
+            legal_moves = self.__generate_legal_moves(board)
 
-        if self.__castling_move(piece, location, move):
-            self.__castle_rook(board, move)
+        self.legal_moves_cache.put(key, legal_moves)
+        board.set_legal_moves(legal_moves)
 
-        board.change_colour()
+    def __generate_legal_moves(self, board):
+        """Generate encoded legal moves of side to move by walking squares of the board"""
+        legal_moves = array('H')
+
+        colour = board.current_colour()
+        king_location = board.king_location_by_colour(colour)
+        un_passant_attack = board.get_un_passant_attack()
+
+        # Find pieces giving check and pinned pieces once per position
+        checkers, pins = self.__checkers_and_pins(board, king_location, colour)
+        # When in check other pieces can only take checking piece or block it
+        evasions = checkers[0] if len(checkers) == 1 else None
+
+        # For each piece of moving side
+        for location, piece in board.piece_locations(colour):
+            # Only king can move in double check
+            if len(checkers) > 1 and piece.kind != KING:
+                continue
+
+            # get piece moves by its moving rules
+            piece_attacking_moves, piece_position_moves = piece.get_moves(board, location)
+
+            if piece.kind == KING:
+                # King can't step on attacked square, lift it so it doesn't hide squares behind it
+                board.set_piece(None, location)
+                legal_attacks = [move for move in piece_attacking_moves
+                                 if not board.is_attacked(move, board.opposite_colour())]
+                legal_positions = [move for move in piece_position_moves
+                                   if not board.is_attacked(move, board.opposite_colour())]
+                board.set_piece(piece, location)
 
-    def __castling_move(self, piece, location, move):
-        """Castling"""
-        its_castling = False
-        if self.pieces.is_king(piece):
-            if abs(location[1] - move[1]) == 2:
-                its_castling = True
+            else:
+                # Pinned piece can only move along the pin
+                pin = pins.get(location)
 
-        return its_castling
+                legal_attacks = []
+                for move in piece_attacking_moves:
+                    # un passant take removes piece from another square, so simulate it
+                    if move == un_passant_attack and piece.kind == PAWN:
+                        if self.__move_legal(board, location, move):
+                            legal_attacks.append(move)
+                    elif (pin is None or move in pin) and (evasions is None or move in evasions):
+                        legal_attacks.append(move)
 
-    @staticmethod
-    def __castle_rook(board, move):
-        """Move rook when castling"""
-        # king side castling
-        if move[1] == 6:
-            rook_location = (move[0], 7)
-            rook_move = (move[0], 5)
-        # queen side castling
-        elif move[1] == 2:
-            rook_location = (move[0], 0)
-            rook_move = (move[0], 3)
-        # internal error
-        else:
-            rook_location = None
-            rook_move = None
+                legal_positions = [move for move in piece_position_moves
+                                   if (pin is None or move in pin) and (evasions is None or move in evasions)]
 
-        board.place_piece(board.get_piece(rook_location), rook_move)
-        board.clear_location(rook_location)
+            self.__add_moves(legal_moves, piece, location, legal_attacks, legal_positions, un_passant_attack)
 
-    def compute_legal_moves(self, board):
-        """Compute legal moves for each piece on a given board"""
-        legal_moves = [[[] for _ in range(board.length())]
-                       for _ in range(board.length())]
-
-        # For each square
-        for rank, file in product(range(board.length()), range(board.length())):
-            location = (rank, file)
-            piece = board.get_piece(location)
-
-            if piece:
-                # if piece belong to moving side
-                if piece.get_colour() == board.current_colour():
-                    # get piece moves by its moving rules
-                    piece_attacking_moves, piece_position_moves = piece.get_moves(board, location)
-
-                    legal_attacks = []
-                    for move in piece_attacking_moves:
-                        if self.__move_legal(board, location, move):
-                            legal_attacks.append(move)
+        # Castling is not possible when in check
+        if not checkers:
+            for castle_location in self.__compute_castling(board):
+                flags = KING_CASTLE if castle_location[1] > king_location[1] else QUEEN_CASTLE
+                legal_moves.append(encode(king_location, castle_location, flags))
 
-                    legal_positions = []
-                    for move in piece_position_moves:
-                        if self.__move_legal(board, location, move):
-                            legal_positions.append(move)
+        return legal_moves
 
-                    legal_moves[rank][file] = [legal_attacks, legal_positions]
+    @staticmethod
+    def __add_moves(legal_moves, piece, location, attacking_moves, position_moves, un_passant_attack):
+        """Encode piece moves and add them to legal moves"""
+        if piece.kind == PAWN:
+            for move in attacking_moves:
+                # Pawn reaching last rank can be promoted to one of four pieces
+                if move[0] == 0 or move[0] == 7:
+                    for promotion_index in range(4):
+                        legal_moves.append(encode(location, move, PROMOTION_CAPTURE | promotion_index))
+                elif move == un_passant_attack:
+                    legal_moves.append(encode(location, move, UN_PASSANT_CAPTURE))
+                else:
+                    legal_moves.append(encode(location, move, CAPTURE))
+
+            for move in position_moves:
+                if move[0] == 0 or move[0] == 7:
+                    for promotion_index in range(4):
+                        legal_moves.append(encode(location, move, PROMOTION | promotion_index))
+                elif abs(move[0] - location[0]) == 2:
+                    legal_moves.append(encode(location, move, DOUBLE_PAWN_PUSH))
+                else:
+                    legal_moves.append(encode(location, move, QUIET))
 
-        castling_moves = self.__compute_castling(board)
-        # if castling is possible add it to king's legal moves
-        if castling_moves:
-            king_rank, king_file = board.king_location_by_colour(board.current_colour())
-            # if castling is possible, then at least 1 move for the king is possible
-            legal_attacks, legal_positions = legal_moves[king_rank][king_file]
-            for castle_location in castling_moves:
-                legal_positions.append(castle_location)
-            legal_moves[king_rank][king_file] = [legal_attacks, legal_positions]
+        else:
+            for move in attacking_moves:
+                legal_moves.append(encode(location, move, CAPTURE))
+            for move in position_moves:
+                legal_moves.append(encode(location, move, QUIET))
 
-        board.set_legal_moves(legal_moves)
+    @staticmethod
+    def __checkers_and_pins(board, king_location, colour):
+        """Find squares to stop each check and moves available for pinned pieces"""
+        # Squares where check can be stopped, for each checking piece
+        checkers = []
+        # Squares pinned piece can move to, by its location
+        pins = {}
+        king_rank, king_file = king_location
+        king_square = king_rank * 8 + king_file
+
+        # Look for sliding pieces from the king
+        for direction, ray in enumerate(RAYS[king_square]):
+            # kind of piece sliding this way besides queen
+            sliding_kind = ROOK if direction < ORTHOGONAL_DIRECTIONS_NUM else BISHOP
+            pinned_location = None
+            for distance, square in enumerate(ray):
+                piece = board.get_piece(square)
+                if piece is not None:
+                    if piece.get_colour() == colour:
+                        # second own piece on the ray, nothing is pinned
+                        if pinned_location is not None:
+                            break
+                        pinned_location = square
+                    else:
+                        # opponent piece slides this way
+                        if piece.kind == sliding_kind or piece.kind == QUEEN:
+                            if pinned_location is None:
+                                checkers.append(set(ray[:distance + 1]))
+                            else:
+                                pins[pinned_location] = set(ray[:distance + 1])
+                        break
 
-    def __simulate_move(self, board, location, move):
-        """Create board and simulate a move"""
-        # Create copy of board
-        computational_board = board.copy()
+        # Knights can only be taken to stop check
+        for square in KNIGHT_TARGETS[king_square]:
+            piece = board.get_piece(square)
+            if piece is not None and piece.kind == KNIGHT and piece.get_colour() != colour:
+                checkers.append({square})
 
-        # Simulate move on the copy
-        self.__move_piece(computational_board, location, move)
+        # Pawns as well, they attack king from squares its own pawn would attack
+        for square in PAWN_ATTACKS[colour][king_square]:
+            piece = board.get_piece(square)
+            if piece is not None and piece.kind == PAWN and piece.get_colour() != colour:
+                checkers.append({square})
 
-        return computational_board
+        return checkers, pins
 
     def __move_legal(self, board, location, move):
         """Check if move is legal"""
-        # simulate move on the copy of the board
-        computational_board = self.__simulate_move(board, location, move)
+        # make move on the board
+        board.make_move(location, move)
         # if king won't be in check
-        king_location = computational_board.king_location_by_colour(board.current_colour())
+        king_location = board.king_location_by_colour(board.opposite_colour())
         # then move is legal
-        return not self.__square_under_attack(computational_board, king_location, board.opposite_colour())
+        legal = not board.is_attacked(king_location, board.current_colour())
+        # and restore the board
+        board.unmake_move()
 
-    @staticmethod
-    def __square_under_attack(board, square, attacker_colour):
-        """Compute attacking moves for given board, side to move and check if king in check"""
-        check = False
-        for rank, file in product(range(board.length()), range(board.length())):
-            location = (rank, file)
-            piece = board.get_piece(location)
-            piece: Piece
-            if piece:
-                # move is simulated, so next to move is opponent
-                if piece.get_colour() == attacker_colour:
-                    piece_attacking_moves, piece_position_moves = piece.get_moves(board, location)
-                    if square in piece_attacking_moves:
-                        check = True
-                        break
-
-        return check
+        return legal
 
     @staticmethod
     def check_mate(board):
         """Check if it is mate in position"""
-        mate = True
-        # For each square
-        for rank, file in product(range(board.length()), range(board.length())):
-            # get legal moves for a piece
-            piece_moves = board.get_piece_legal_moves((rank, file))
-            if piece_moves:
-                attacking_moves, position_moves = piece_moves
-                # and if there is any
-                if attacking_moves + position_moves:
-                    # it's not mate
-                    mate = False
-                    break
-
-        return mate
+        return board.is_mate()
 
     def __compute_castling(self, board):
         """Computation of castling moves"""
@@ -208,63 +238,55 @@ class Engine:
         king_rank, king_file = board.king_location_by_colour(board.current_colour())
         king = board.get_piece((king_rank, king_file))
 
-        # King can't be in check
-        king_under_attack = self.__square_under_attack(board, (king_rank, king_file), board.opposite_colour())
-        # King didn't move
-        king_moved = king.is_moved()
-
-        if not king_moved and not king_under_attack:
+        # King didn't move, being in check is ruled out by caller
+        if not king.is_moved():
             castle_k, castle_q = king.castling((king_rank, king_file))
             k_rook = board.get_piece((king_rank, 7))
             if k_rook:
-                if not k_rook.is_moved():
-                    # if squares between rook and king are not under attack
-                    if not self.__square_under_attack(board, (king_rank, king_file + 1), board.opposite_colour()) and \
-                       not self.__square_under_attack(board, (king_rank, king_file + 2), board.opposite_colour()):
+                # if rook didn't move and squares between rook and king are empty
+                if not k_rook.is_moved() and self.__squares_empty(board, king_rank, range(king_file + 1, 7)):
+                    # if king doesn't pass or land on attacked square
+                    if not board.is_attacked((king_rank, king_file + 1), board.opposite_colour()) and \
+                       not board.is_attacked((king_rank, king_file + 2), board.opposite_colour()):
                         castle.append(castle_k)
             q_rook = board.get_piece((king_rank, 0))
             if q_rook:
-                if not q_rook.is_moved():
-                    # if squares between rook and king are not under attack
-                    if not self.__square_under_attack(board, (king_rank, king_file - 1), board.opposite_colour()) and \
-                       not self.__square_under_attack(board, (king_rank, king_file - 2), board.opposite_colour()):
+                # if rook didn't move and squares between rook and king are empty
+                if not q_rook.is_moved() and self.__squares_empty(board, king_rank, range(1, king_file)):
+                    # if king doesn't pass or land on attacked square
+                    if not board.is_attacked((king_rank, king_file - 1), board.opposite_colour()) and \
+                       not board.is_attacked((king_rank, king_file - 2), board.opposite_colour()):
                         castle.append(castle_q)
         return castle
 
     @staticmethod
-    def __compute_un_passant(board, piece, location, move):
-        """Compute and set un passant parameters"""
-        rank, file = move
-
-        # If pawn have made double forward move
-        if abs(location[0] - move[0]) == 2:
-
-            # Make un passant available
-            if piece.get_colour() == "white":
-                un_passant = (rank - 1, file)
-            elif piece.get_colour() == "black":
-                un_passant = (rank + 1, file)
-            else:
-                # internal error
-                un_passant = None
-
-            # Save location of piece available for un passant take
-            board.set_un_passant(un_passant, move)
-
+    def __squares_empty(board, rank, files):
+        """Check if there are no pieces on given files of the rank"""
+        empty = True
+        for file in files:
+            if board.get_piece((rank, file)):
+                empty = False
+                break
+
+        return empty
+
+    def make_move(self, board, encoded_move):
+        """Make encoded move on the board"""
+        location, move, flags = decode(encoded_move)
+        if flags & PROMOTION:
+            promotion = self.pawn_promotions[board.current_colour()][flags & 3]
         else:
-            # Make un passant unavailable
-            board.clear_un_passant()
+            promotion = None
 
-    @staticmethod
-    def __clear_un_passant(board, location):
-        """Clear un passant"""
-        # If piece was taken un passant
-        if board.get_un_passant_attack() == location:
-            # Clear victim square
-            board.clear_location(board.get_un_passant_victim_location())
+        board.make_move(location, move, promotion)
 
-        # Make un passant unavailable
-        board.clear_un_passant()
+    def play_move(self, board, encoded_move):
+        """Make encoded move in the game and check for mate"""
+        self.make_move(board, encoded_move)
+
+        self.compute_legal_moves(board)
+        if self.check_mate(board):
+            self.ui.set_mate()
 
     def possible_pawn_promotions(self, colour):
         """Get possible pawn promotions for given colour"""
@@ -285,20 +307,11 @@ class Engine:
 
     def promote_pawn(self, board, piece):
         """Promote pawn"""
-        # Place piece
-        board.place_piece(piece, self.promotion_move)
-
-        #  and get flag if un passant will be available
-        board.update_parameters(piece, self.promotion_move)
-        board.clear_location(self.promotion_location)
-        # Delete un passant squares
-        self.__clear_un_passant(board, self.promotion_move)
+        board.make_move(self.promotion_location, self.promotion_move, piece)
 
         self.promotion_location = None
         self.promotion_move = None
 
-        board.change_colour()
-
         self.compute_legal_moves(self.board)
         if self.check_mate(self.board):
             self.ui.set_mate()
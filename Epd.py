@@ -0,0 +1,36 @@
+from Board import Board
+
+
+def parse_epd(line):
+    """Split EPD line into FEN and operations by opcode.
+    Move counters after the four position fields are kept in FEN, as perft suites give them"""
+    fields = line.split(None, 6)
+    if len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit():
+        fen = " ".join(fields[:6])
+        rest = fields[6] if len(fields) > 6 else ""
+    else:
+        fields = line.split(None, 4)
+        fen = " ".join(fields[:4])
+        rest = fields[4] if len(fields) > 4 else ""
+
+    # Operations are separated by semicolons, e.g. bm Nf3; id "test 1"; or ;D1 20 ;D2 400
+    operations = {}
+    for operation in rest.split(";"):
+        opcode, _, operand = operation.strip().partition(" ")
+        if opcode:
+            operations[opcode] = operand.strip().strip('"')
+
+    return fen, operations
+
+
+def read_epd(path, pieces, board_type=Board):
+    """Yield board and operations for every position of EPD file, reading it line by line"""
+    with open(path) as epd_file:
+        for line in epd_file:
+            line = line.strip()
+            # Skip empty lines and comments
+            if not line or line.startswith("#"):
+                continue
+
+            fen, operations = parse_epd(line)
+            yield board_type.from_fen(fen, pieces), operations
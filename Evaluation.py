@@ -0,0 +1,218 @@
+import json
+
+from AttackTables import least_valuable_attacker
+from Piece import KNIGHT, BISHOP, QUEEN, KING, KINDS_NUM
+
+# Material value of each piece kind in centipawns
+PIECE_VALUES = (100, 320, 330, 500, 900, 0)
+
+# Material values by game stage
+MIDGAME_VALUES = [100, 320, 330, 500, 900, 0]
+ENDGAME_VALUES = [120, 300, 320, 520, 940, 0]
+
+# Contribution of piece kind to game phase, all pieces on board make full midgame
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0)
+TOTAL_PHASE = 24
+
+# Square bonuses for white pieces, written as the board is seen with rank 8 on top.
+# Black pieces use the same tables mirrored
+MIDGAME_TABLES = [
+    # Pawn
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     10, 10, 20, 30, 30, 20, 10, 10,
+     5, 5, 10, 25, 25, 10, 5, 5,
+     0, 0, 0, 20, 20, 0, 0, 0,
+     5, -5, -10, 0, 0, -10, -5, 5,
+     5, 10, 10, -20, -20, 10, 10, 5,
+     0, 0, 0, 0, 0, 0, 0, 0],
+    # Knight
+    [-50, -40, -30, -30, -30, -30, -40, -50,
+     -40, -20, 0, 0, 0, 0, -20, -40,
+     -30, 0, 10, 15, 15, 10, 0, -30,
+     -30, 5, 15, 20, 20, 15, 5, -30,
+     -30, 0, 15, 20, 20, 15, 0, -30,
+     -30, 5, 10, 15, 15, 10, 5, -30,
+     -40, -20, 0, 5, 5, 0, -20, -40,
+     -50, -40, -30, -30, -30, -30, -40, -50],
+    # Bishop
+    [-20, -10, -10, -10, -10, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 10, 10, 5, 0, -10,
+     -10, 5, 5, 10, 10, 5, 5, -10,
+     -10, 0, 10, 10, 10, 10, 0, -10,
+     -10, 10, 10, 10, 10, 10, 10, -10,
+     -10, 5, 0, 0, 0, 0, 5, -10,
+     -20, -10, -10, -10, -10, -10, -10, -20],
+    # Rook
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     5, 10, 10, 10, 10, 10, 10, 5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     -5, 0, 0, 0, 0, 0, 0, -5,
+     0, 0, 0, 5, 5, 0, 0, 0],
+    # Queen
+    [-20, -10, -10, -5, -5, -10, -10, -20,
+     -10, 0, 0, 0, 0, 0, 0, -10,
+     -10, 0, 5, 5, 5, 5, 0, -10,
+     -5, 0, 5, 5, 5, 5, 0, -5,
+     0, 0, 5, 5, 5, 5, 0, -5,
+     -10, 5, 5, 5, 5, 5, 0, -10,
+     -10, 0, 5, 0, 0, 0, 0, -10,
+     -20, -10, -10, -5, -5, -10, -10, -20],
+    # King
+    [-30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -30, -40, -40, -50, -50, -40, -40, -30,
+     -20, -30, -30, -40, -40, -30, -30, -20,
+     -10, -20, -20, -20, -20, -20, -20, -10,
+     20, 20, 0, 0, 0, 0, 20, 20,
+     20, 30, 10, 0, 0, 10, 30, 20],
+]
+
+ENDGAME_TABLES = [
+    # Pawn
+    [0, 0, 0, 0, 0, 0, 0, 0,
+     80, 80, 80, 80, 80, 80, 80, 80,
+     50, 50, 50, 50, 50, 50, 50, 50,
+     30, 30, 30, 30, 30, 30, 30, 30,
+     20, 20, 20, 20, 20, 20, 20, 20,
+     10, 10, 10, 10, 10, 10, 10, 10,
+     0, 0, 0, 0, 0, 0, 0, 0,
+     0, 0, 0, 0, 0, 0, 0, 0],
+    # Knight
+    list(MIDGAME_TABLES[KNIGHT]),
+    # Bishop
+    list(MIDGAME_TABLES[BISHOP]),
+    # Rook
+    [0] * 64,
+    # Queen
+    list(MIDGAME_TABLES[QUEEN]),
+    # King
+    [-50, -40, -30, -20, -20, -30, -40, -50,
+     -30, -20, -10, 0, 0, -10, -20, -30,
+     -30, -10, 20, 30, 30, 20, -10, -30,
+     -30, -10, 30, 40, 40, 30, -10, -30,
+     -30, -10, 30, 40, 40, 30, -10, -30,
+     -30, -10, 20, 30, 30, 20, -10, -30,
+     -30, -30, 0, 0, 0, 0, -30, -30,
+     -50, -30, -30, -30, -30, -30, -30, -50],
+]
+
+PIECE_NAMES = ("pawn", "knight", "bishop", "rook", "queen", "king")
+
+# Signed material plus square bonus by piece index and square index, white counts positive.
+# Board keeps its running score with these, so they are refilled in place on loading
+MIDGAME_SCORES = [[0] * 64 for _ in range(KINDS_NUM * 2)]
+ENDGAME_SCORES = [[0] * 64 for _ in range(KINDS_NUM * 2)]
+
+
+def build_scores():
+    """Combine material values and square tables into scores by piece index and square"""
+    for kind in range(KINDS_NUM):
+        for square in range(64):
+            rank, file = divmod(square, 8)
+            # Tables start from rank 8 for white, black sees them mirrored
+            white_square = (7 - rank) * 8 + file
+            black_square = rank * 8 + file
+            MIDGAME_SCORES[kind][square] = MIDGAME_VALUES[kind] + MIDGAME_TABLES[kind][white_square]
+            ENDGAME_SCORES[kind][square] = ENDGAME_VALUES[kind] + ENDGAME_TABLES[kind][white_square]
+            MIDGAME_SCORES[kind + KINDS_NUM][square] = -MIDGAME_VALUES[kind] - MIDGAME_TABLES[kind][black_square]
+            ENDGAME_SCORES[kind + KINDS_NUM][square] = -ENDGAME_VALUES[kind] - ENDGAME_TABLES[kind][black_square]
+
+
+def load_tables(path):
+    """Load material values and square tables from JSON file, missing entries keep current values.
+    Boards created before loading should refresh their evaluation"""
+    with open(path) as tables_file:
+        tables = json.load(tables_file)
+
+    for stage, values, stage_tables in (("midgame", MIDGAME_VALUES, MIDGAME_TABLES),
+                                        ("endgame", ENDGAME_VALUES, ENDGAME_TABLES)):
+        stage_data = tables.get(stage, {})
+        for kind, name in enumerate(PIECE_NAMES):
+            if name in stage_data.get("values", {}):
+                values[kind] = int(stage_data["values"][name])
+            if name in stage_data.get("tables", {}):
+                table = stage_data["tables"][name]
+                if len(table) != 64:
+                    raise ValueError("square table of " + name + " must have 64 values")
+                stage_tables[kind][:] = [int(value) for value in table]
+
+    build_scores()
+
+
+def save_tables(path):
+    """Save material values and square tables to JSON file in format of load_tables"""
+    tables = {}
+    for stage, values, stage_tables in (("midgame", MIDGAME_VALUES, MIDGAME_TABLES),
+                                        ("endgame", ENDGAME_VALUES, ENDGAME_TABLES)):
+        tables[stage] = {"values": dict(zip(PIECE_NAMES, values)),
+                         "tables": dict(zip(PIECE_NAMES, stage_tables))}
+
+    with open(path, "w") as tables_file:
+        json.dump(tables, tables_file, indent=1)
+
+
+build_scores()
+
+
+def taper(midgame_score, endgame_score, phase):
+    """Blend midgame and endgame scores by game phase"""
+    phase = min(phase, TOTAL_PHASE)
+    return (midgame_score * phase + endgame_score * (TOTAL_PHASE - phase)) // TOTAL_PHASE
+
+
+def compute_scores(board):
+    """Compute midgame score, endgame score and phase of white by scanning all pieces"""
+    midgame_score = endgame_score = phase = 0
+    for colour in ("white", "black"):
+        for (rank, file), piece in board.piece_locations(colour):
+            index = piece.get_index()
+            midgame_score += MIDGAME_SCORES[index][rank * 8 + file]
+            endgame_score += ENDGAME_SCORES[index][rank * 8 + file]
+            phase += PHASE_WEIGHTS[piece.kind]
+
+    return midgame_score, endgame_score, phase
+
+
+def evaluate(board):
+    """Compute evaluation from side to move point of view from scratch.
+    Board keeps the same score updated with every change, see Board.evaluate"""
+    score = taper(*compute_scores(board))
+
+    return score if board.current_colour() == "white" else -score
+
+
+# Values for exchanges, king can only take last
+EXCHANGE_VALUES = PIECE_VALUES[:KING] + (20000,)
+
+
+def static_exchange(board, location, move):
+    """Get material won by capture on move square followed by exchanges with least valuable pieces"""
+    attacker = board.get_piece(location)
+    gains = [EXCHANGE_VALUES[board.get_piece(move).kind]]
+    attacker_value = EXCHANGE_VALUES[attacker.kind]
+    removed = {location}
+    colour = "black" if attacker.get_colour() == "white" else "white"
+
+    while True:
+        next_attacker = least_valuable_attacker(board, move, colour, removed)
+        if next_attacker is None:
+            break
+
+        next_location, next_piece = next_attacker
+        # Taking last capturing piece gains its value minus what opponent has gained
+        gains.append(attacker_value - gains[-1])
+        attacker_value = EXCHANGE_VALUES[next_piece.kind]
+        removed.add(next_location)
+        colour = "black" if colour == "white" else "white"
+
+    # Each side can stop exchanging when continuing loses material
+    for index in range(len(gains) - 1, 0, -1):
+        gains[index - 1] = -max(-gains[index - 1], gains[index])
+
+    return gains[0]
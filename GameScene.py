@@ -95,6 +95,10 @@ class GameScene:
 
     def take_piece(self, location):
         """"Choose piece to move and save it"""
+        # Pieces can't be taken while engine thinks on its move
+        if self.ui.app.is_engine_turn():
+            return
+
         if self.board.get_piece_legal_moves(location):
             # save location of piece
             self.selected_piece_location = location
@@ -0,0 +1,54 @@
+from collections import OrderedDict
+
+
+class LegalMovesCache:
+    def __init__(self, capacity):
+        self.capacity = capacity
+
+        # Position key to cached entry, least recently used first
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get entry by position key or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            # Mark entry as most recently used
+            self.entries.move_to_end(key)
+
+        return entry
+
+    def put(self, key, entry):
+        """Save entry, evicting least recently used one when full"""
+        if self.capacity <= 0:
+            return
+
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def set_capacity(self, capacity):
+        """Change capacity, evicting entries which don't fit"""
+        self.capacity = capacity
+        while len(self.entries) > max(capacity, 0):
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries and reset counters"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def hit_rate(self):
+        """Get share of lookups found in cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,103 @@
+from AttackTables import SQUARES
+
+# Move is packed in 16 bits: from square in bits 0-5, to square in bits 6-11 and flags in bits 12-15
+QUIET = 0
+DOUBLE_PAWN_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+UN_PASSANT_CAPTURE = 5
+# Two lowest flag bits of promotion are index of the piece: knight, bishop, rook, queen
+PROMOTION = 8
+PROMOTION_CAPTURE = 12
+
+PROMOTION_SYMBOLS = "nbrq"
+FILE_NAMES = "abcdefgh"
+
+
+def encode(location, move, flags):
+    """Pack move into integer"""
+    return (location[0] * 8 + location[1]) | (move[0] * 8 + move[1]) << 6 | flags << 12
+
+
+def decode(encoded_move):
+    """Unpack location, move and flags"""
+    return SQUARES[encoded_move & 63], SQUARES[encoded_move >> 6 & 63], encoded_move >> 12
+
+
+def from_square(encoded_move):
+    """Get index of square move starts from"""
+    return encoded_move & 63
+
+
+def to_square(encoded_move):
+    """Get index of square move ends on"""
+    return encoded_move >> 6 & 63
+
+
+def get_flags(encoded_move):
+    """Get move flags"""
+    return encoded_move >> 12
+
+
+def is_capture(encoded_move):
+    """Check if move takes a piece, un passant included"""
+    return encoded_move >> 12 & CAPTURE != 0
+
+
+def is_promotion(encoded_move):
+    """Check if pawn is promoted by move"""
+    return encoded_move >> 12 & PROMOTION != 0
+
+
+def promotion_index(encoded_move):
+    """Get index of piece pawn is promoted to, in order of Engine pawn promotions"""
+    return encoded_move >> 12 & 3
+
+
+def square_name(location):
+    """Get algebraic name of square"""
+    rank, file = location
+    return FILE_NAMES[file] + str(rank + 1)
+
+
+def move_name(encoded_move):
+    """Get move name in coordinate notation"""
+    location, move, flags = decode(encoded_move)
+    name = square_name(location) + square_name(move)
+    if flags & PROMOTION:
+        name += PROMOTION_SYMBOLS[flags & 3]
+
+    return name
+
+
+def find_move(legal_moves, name):
+    """Get encoded legal move by its name in coordinate notation, None if there is no such move"""
+    for encoded_move in legal_moves:
+        if move_name(encoded_move) == name:
+            return encoded_move
+
+    return None
+
+
+def decode_piece_moves(legal_moves, location):
+    """Get attacking and position moves from location as lists of squares, None if there are no moves"""
+    square = location[0] * 8 + location[1]
+    attacking_moves = []
+    position_moves = []
+    for encoded_move in legal_moves:
+        if encoded_move & 63 == square:
+            move = SQUARES[encoded_move >> 6 & 63]
+            # promotions to different pieces share the square
+            if encoded_move >> 12 & CAPTURE:
+                if move not in attacking_moves:
+                    attacking_moves.append(move)
+            elif move not in position_moves:
+                position_moves.append(move)
+
+    if attacking_moves or position_moves:
+        piece_moves = [attacking_moves, position_moves]
+    else:
+        piece_moves = None
+
+    return piece_moves
@@ -0,0 +1,78 @@
+from AttackTables import SQUARES
+from Evaluation import PIECE_VALUES
+from Move import CAPTURE, PROMOTION, UN_PASSANT_CAPTURE
+from Piece import PAWN, QUEEN
+
+MAX_PLY = 128
+
+# Score bands, so each group of moves goes after the previous one
+HASH_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 26
+HISTORY_LIMIT = 1 << 24
+
+
+class MoveOrdering:
+    def __init__(self):
+        # Two quiet moves which caused cutoff at each ply
+        self.killer_moves = [[0, 0] for _ in range(MAX_PLY)]
+        # Cutoff statistics of quiet moves by colour, from and to squares
+        self.history = {"white": [0] * 4096, "black": [0] * 4096}
+
+    def clear(self):
+        """Forget killer moves and history, e.g. between games"""
+        for killers in self.killer_moves:
+            killers[0] = killers[1] = 0
+        for colour_history in self.history.values():
+            colour_history[:] = [0] * 4096
+
+    def order_moves(self, board, legal_moves, hash_move, ply):
+        """Sort moves: hash move, captures by MVV-LVA, killer moves, quiet moves by history"""
+        killers = self.killer_moves[ply] if ply < MAX_PLY else (0, 0)
+        history = self.history[board.current_colour()]
+
+        # Moves are decoded inline, helpers of Move would cost a call for every move of every node
+        scored_moves = []
+        for encoded_move in legal_moves:
+            flags = encoded_move >> 12
+            if encoded_move == hash_move:
+                score = HASH_MOVE_SCORE
+            elif flags & (CAPTURE | PROMOTION):
+                # Most valuable victim, then least valuable attacker
+                if flags == UN_PASSANT_CAPTURE:
+                    victim_value = PIECE_VALUES[PAWN]
+                elif flags & CAPTURE:
+                    victim_value = PIECE_VALUES[board.get_piece(SQUARES[encoded_move >> 6 & 63]).kind]
+                else:
+                    victim_value = 0
+                # Promotion to queen wins about as much as taking one
+                if flags & PROMOTION and flags & 3 == 3:
+                    victim_value += PIECE_VALUES[QUEEN]
+                attacker = board.get_piece(SQUARES[encoded_move & 63])
+                score = CAPTURE_SCORE + victim_value * 8 - attacker.kind
+            elif encoded_move == killers[0]:
+                score = KILLER_SCORE + 1
+            elif encoded_move == killers[1]:
+                score = KILLER_SCORE
+            else:
+                score = history[encoded_move & 4095]
+            scored_moves.append((score, encoded_move))
+
+        scored_moves.sort(reverse=True)
+
+        return [encoded_move for score, encoded_move in scored_moves]
+
+    def update_quiet_cutoff(self, colour, encoded_move, depth, ply):
+        """Remember quiet move which caused beta cutoff"""
+        if ply < MAX_PLY:
+            killers = self.killer_moves[ply]
+            if killers[0] != encoded_move:
+                killers[1] = killers[0]
+                killers[0] = encoded_move
+
+        history = self.history[colour]
+        history[encoded_move & 4095] += depth * depth
+        # Keep history below killer moves band
+        if history[encoded_move & 4095] >= HISTORY_LIMIT:
+            for index in range(4096):
+                history[index] //= 2
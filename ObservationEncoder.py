@@ -0,0 +1,159 @@
+import numpy as np
+
+from AttackTables import SQUARES, KNIGHT_OFFSETS, RAYS, on_board
+from Board import Board
+from ChessEnv import ACTIONS_NUM, PIECE_PLANES_NUM, move_to_action
+from Zobrist import CASTLING_RIGHTS_NUM
+
+# Policy has 73 move types for every from square: queen-like moves by 8 directions and 7 distances,
+# 8 knight jumps and underpromotions to knight, bishop or rook by 3 file steps.
+# Index is move type * 64 + from square, so policy reshapes to (73, 8, 8)
+QUEEN_MOVE_TYPES_NUM = 8 * 7
+KNIGHT_MOVE_TYPES_NUM = len(KNIGHT_OFFSETS)
+UNDERPROMOTION_TYPES_NUM = 3 * 3
+MOVE_TYPES_NUM = QUEEN_MOVE_TYPES_NUM + KNIGHT_MOVE_TYPES_NUM + UNDERPROMOTION_TYPES_NUM
+POLICY_SIZE = MOVE_TYPES_NUM * 64
+
+EMPTY_SQUARES = (0,) * 64
+
+
+def build_policy_tables():
+    """Map actions of ChessEnv to policy indexes and back, -1 marks actions and indexes without pair"""
+    action_policy = np.full(ACTIONS_NUM, -1, dtype=np.int32)
+    policy_action = np.full(POLICY_SIZE, -1, dtype=np.int32)
+
+    for square, (rank, file) in enumerate(SQUARES):
+        for direction, ray in enumerate(RAYS[square]):
+            for distance, (move_rank, move_file) in enumerate(ray):
+                policy_index = (direction * 7 + distance) * 64 + square
+                action = square + (move_rank * 8 + move_file) * 64
+                action_policy[action] = policy_index
+                policy_action[policy_index] = action
+                # Pawn promoting to queen uses the same queen-like move
+                if distance == 0 and abs(move_rank - rank) == 1 and move_rank in (0, 7):
+                    action_policy[action + 4096 * 4] = policy_index
+
+        for jump, (rank_step, file_step) in enumerate(KNIGHT_OFFSETS):
+            if on_board(rank + rank_step, file + file_step):
+                policy_index = (QUEEN_MOVE_TYPES_NUM + jump) * 64 + square
+                action = square + ((rank + rank_step) * 8 + file + file_step) * 64
+                action_policy[action] = policy_index
+                policy_action[policy_index] = action
+
+        # Pawns promote from the seventh rank of their colour
+        if rank in (1, 6):
+            move_rank = 7 if rank == 6 else 0
+            for promotion_index in range(3):
+                for file_step in (-1, 0, 1):
+                    if not on_board(move_rank, file + file_step):
+                        continue
+                    move_type = QUEEN_MOVE_TYPES_NUM + KNIGHT_MOVE_TYPES_NUM + promotion_index * 3 + file_step + 1
+                    policy_index = move_type * 64 + square
+                    action = square + (move_rank * 8 + file + file_step) * 64 + 4096 * (1 + promotion_index)
+                    action_policy[action] = policy_index
+                    policy_action[policy_index] = action
+
+    return action_policy, policy_action
+
+
+ACTION_POLICY_INDEXES, POLICY_ACTIONS = build_policy_tables()
+
+
+def policy_index(encoded_move):
+    """Get policy index of encoded move"""
+    return int(ACTION_POLICY_INDEXES[move_to_action(encoded_move)])
+
+
+def decode_policy_index(board, index):
+    """Get encoded legal move of policy index, None if it is not legal in position.
+    Queen-like pawn moves to the last rank promote to queen"""
+    action = int(POLICY_ACTIONS[index])
+    if action < 0:
+        return None
+
+    for encoded_move in board.legal_moves:
+        move_action = move_to_action(encoded_move)
+        if move_action == action or move_action == action + 4096 * 4:
+            return encoded_move
+
+    return None
+
+
+class ObservationEncoder:
+    def __init__(self, history_length=1):
+        # Current position and previous ones, each has planes of all pieces
+        self.history_length = history_length
+
+        # Plane layout: piece planes of every position from the current one back, then side to move,
+        # castling rights, un passant square and halfmove clock
+        self.side_plane = PIECE_PLANES_NUM * history_length
+        self.castling_plane = self.side_plane + 1
+        self.un_passant_plane = self.castling_plane + CASTLING_RIGHTS_NUM
+        self.halfmove_plane = self.un_passant_plane + 1
+        self.channels = self.halfmove_plane + 1
+        self.shape = (self.channels, 8, 8)
+
+        # Piece index + 1 by square of position being restored from history, reused by every call
+        self.squares = [0] * 64
+
+    def new_buffer(self, dtype=np.float32):
+        """Allocate observation buffer to reuse between calls"""
+        return np.zeros(self.shape, dtype=dtype)
+
+    def encode(self, board, out):
+        """Write observation of board into preallocated (C, 8, 8) buffer.
+        Previous positions are restored from the board undo records, missing ones stay empty"""
+        if out.shape != self.shape:
+            raise ValueError("observation buffer must have shape {}".format(self.shape))
+
+        out.fill(0)
+        track_history = self.history_length > 1 and board.undo_stack
+        squares = self.squares
+        if track_history:
+            squares[:] = EMPTY_SQUARES
+        for colour in ("white", "black"):
+            for (rank, file), piece in board.piece_locations(colour):
+                out[piece.get_index(), rank, file] = 1
+                if track_history:
+                    squares[rank * 8 + file] = piece.get_index() + 1
+
+        # Undo records give changes back to previous positions
+        undo_stack = board.undo_stack
+        for history_index in range(1, min(self.history_length, len(undo_stack) + 1)):
+            location, move, piece, captured_piece, captured_location, castling_rook = undo_stack[-history_index][:6]
+            squares[move[0] * 8 + move[1]] = 0
+            if castling_rook is not None:
+                # Rook is on the other side of the king, return it to the corner
+                rook_location, rook_move = Board.castling_rook_squares(move)
+                squares[rook_move[0] * 8 + rook_move[1]] = 0
+                squares[rook_location[0] * 8 + rook_location[1]] = castling_rook.get_index() + 1
+            if captured_piece is not None:
+                squares[captured_location[0] * 8 + captured_location[1]] = captured_piece.get_index() + 1
+            squares[location[0] * 8 + location[1]] = piece.get_index() + 1
+
+            first_plane = history_index * PIECE_PLANES_NUM - 1
+            for square, piece_index in enumerate(squares):
+                if piece_index:
+                    out[first_plane + piece_index, square >> 3, square & 7] = 1
+
+        if board.current_colour() == "black":
+            out[self.side_plane] = 1
+        castling_rights = board.get_castling_rights()
+        for index in range(CASTLING_RIGHTS_NUM):
+            if castling_rights >> index & 1:
+                out[self.castling_plane + index] = 1
+        un_passant_attack = board.get_un_passant_attack()
+        if un_passant_attack is not None:
+            out[self.un_passant_plane, un_passant_attack[0], un_passant_attack[1]] = 1
+        out[self.halfmove_plane] = min(board.halfmove_clock, 255)
+
+        return out
+
+    @staticmethod
+    def encode_legal_mask(board, out):
+        """Write ones for policy indexes of legal moves into preallocated buffer of POLICY_SIZE"""
+        out.fill(0)
+        for encoded_move in board.legal_moves:
+            out[ACTION_POLICY_INDEXES[move_to_action(encoded_move)]] = 1
+
+        return out
@@ -0,0 +1,179 @@
+import argparse
+import multiprocessing
+import sys
+import time
+from multiprocessing import shared_memory
+
+from BitBoard import BitBoard
+from Board import Board
+from Engine import Engine
+from Move import move_name
+from PiecesCollection import PiecesCollection
+from Search import Search
+from TranspositionTable import TranspositionTable, ENTRY_BYTES, BUCKET_ENTRIES
+
+# Positions searched by the benchmark
+BENCHMARK_POSITIONS = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1"),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10"),
+]
+
+# Iteration skip patterns of helper processes as block sizes and phases, so helpers search different depths
+# at the same time. Patterns repeat after this many helpers
+SKIP_SIZES = (1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 3, 3, 4, 4, 4, 4, 4, 4, 4, 4)
+SKIP_PHASES = (0, 1, 0, 1, 2, 3, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5, 6, 7)
+
+# Search state of worker process, set up once by pool initializer
+worker_state = {}
+
+
+def board_state(board):
+    """Get picklable description of position: board type and FEN"""
+    return board.__class__, board.to_fen()
+
+
+def restore_board(state, pieces):
+    """Create board from description made by board_state"""
+    board_type, fen = state
+    return board_type.from_fen(fen, pieces)
+
+
+def initialize_worker(memory_name, stop_event):
+    """Attach worker process to shared transposition table"""
+    memory = shared_memory.SharedMemory(name=memory_name)
+    pieces = PiecesCollection()
+    pieces.initialize_pieces()
+
+    # Shared memory must stay open while table uses it
+    worker_state["memory"] = memory
+    worker_state["pieces"] = pieces
+    worker_state["transposition_table"] = TranspositionTable(buffer=memory.buf)
+    worker_state["stop_event"] = stop_event
+    worker_state["search"] = None
+
+
+def search_worker(state, depth, time_limit, skip_pattern, age):
+    """Search position in worker process, returning search result"""
+    pieces = worker_state["pieces"]
+    board = restore_board(state, pieces)
+    engine = Engine(board, pieces, None)
+
+    # Killer moves and history stay with the worker between searches
+    search = worker_state["search"]
+    if search is None:
+        search = Search(engine, worker_state["transposition_table"], worker_state["stop_event"])
+        worker_state["search"] = search
+    search.engine = engine
+
+    # All workers store entries with age of the current search
+    return search.search(board, depth, time_limit, skip_pattern=skip_pattern, table_age=age)
+
+
+class ParallelSearch:
+    def __init__(self, processes_num=None, size_mb=64):
+        self.processes_num = processes_num or multiprocessing.cpu_count()
+
+        # Transposition table is shared by all processes, entries are written without locks
+        table_bytes = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_ENTRIES)) * \
+            ENTRY_BYTES * BUCKET_ENTRIES
+        self.memory = shared_memory.SharedMemory(create=True, size=table_bytes)
+        self.transposition_table = TranspositionTable(buffer=self.memory.buf)
+        self.transposition_table.clear()
+
+        self.stop_event = multiprocessing.Event()
+        self.pool = multiprocessing.Pool(self.processes_num, initialize_worker,
+                                         (self.memory.name, self.stop_event))
+
+        self.nodes = 0
+
+    def search(self, board, depth=None, time_limit=None):
+        """Search position with all processes and get result of the deepest finished iteration"""
+        if depth is None and time_limit is None:
+            raise ValueError("search needs depth or time limit")
+
+        self.stop_event.clear()
+        self.transposition_table.new_search()
+        state = board_state(board)
+
+        # Lazy SMP: every process searches the whole tree, the main one all iterations and helpers
+        # with their own skip patterns, so they fill the shared table ahead of the main process
+        tasks = []
+        for worker in range(self.processes_num):
+            if worker == 0:
+                skip_pattern = None
+            else:
+                helper = (worker - 1) % len(SKIP_SIZES)
+                skip_pattern = (SKIP_SIZES[helper], SKIP_PHASES[helper])
+            tasks.append(self.pool.apply_async(search_worker, (state, depth, time_limit, skip_pattern,
+                                                               self.transposition_table.age)))
+
+        # Helpers are not needed once the main process finishes
+        main_result = tasks[0].get()
+        self.stop_event.set()
+        results = [main_result] + [task.get() for task in tasks[1:]]
+
+        self.nodes = sum(result.nodes for result in results if result is not None)
+        best_result = main_result
+        for result in results[1:]:
+            if result is not None and result.best_move is not None and \
+               (best_result is None or result.depth > best_result.depth):
+                best_result = result
+
+        return best_result
+
+    def new_game(self):
+        """Forget results of previous game"""
+        self.transposition_table.clear()
+
+    def close(self):
+        """Stop worker processes and free shared memory"""
+        self.pool.terminate()
+        self.pool.join()
+        self.transposition_table.release()
+        self.memory.close()
+        self.memory.unlink()
+
+
+def run_benchmark(processes_counts, depth, size_mb=64, board_type=Board, output=sys.stdout):
+    """Report time to depth and speedup of parallel search for each number of processes"""
+    pieces = PiecesCollection()
+    pieces.initialize_pieces()
+
+    base_times = {}
+    for processes_num in processes_counts:
+        parallel_search = ParallelSearch(processes_num, size_mb)
+        try:
+            for name, fen in BENCHMARK_POSITIONS:
+                board = board_type.from_fen(fen, pieces)
+                parallel_search.new_game()
+
+                start_time = time.perf_counter()
+                result = parallel_search.search(board, depth)
+                elapsed = time.perf_counter() - start_time
+
+                base_time = base_times.setdefault(name, elapsed)
+                output.write("{:<12} processes {:>3} depth {} move {} score {:>6} nodes {:>9} {:>8.3f}s "
+                             "{:>9.0f} nps  speedup {:.2f}\n".format(
+                                 name, processes_num, result.depth, move_name(result.best_move), result.score,
+                                 parallel_search.nodes, elapsed, parallel_search.nodes / elapsed if elapsed else 0,
+                                 base_time / elapsed if elapsed else 0))
+        finally:
+            parallel_search.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel search speedup benchmark")
+    parser.add_argument("depth", type=int, nargs="?", default=5, help="search depth")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="numbers of processes to compare, first one is the baseline")
+    parser.add_argument("--hash", type=int, default=64, help="transposition table size in MB")
+    parser.add_argument("--bitboard", action="store_true", help="use bitboard backend")
+    args = parser.parse_args()
+
+    run_benchmark(args.processes, args.depth, args.hash, BitBoard if args.bitboard else Board)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
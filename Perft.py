@@ -0,0 +1,158 @@
+import argparse
+import sys
+import time
+
+from BitBoard import BitBoard
+from Board import Board
+from Engine import Engine
+from Epd import read_epd
+from Move import move_name
+from PiecesCollection import PiecesCollection
+
+# Name, FEN and known node counts for depth 1, 2, ...
+REFERENCE_POSITIONS = [
+    ("start", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     (20, 400, 8902, 197281, 4865609)),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     (48, 2039, 97862, 4085603)),
+    ("un passant", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     (14, 191, 2812, 43238, 674624)),
+    ("promotion", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     (6, 264, 9467, 422333)),
+    ("promotion mirrored", "r2q1rk1/pP1p2pp/Q4n2/bbp1p3/Np6/1B3NBn/pPPP1PPP/R3K2R b KQ - 0 1",
+     (6, 264, 9467, 422333)),
+    ("discovered check", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     (44, 1486, 62379, 2103487)),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     (46, 2079, 89890, 3894594)),
+]
+
+
+class Perft:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def perft(self, board, depth):
+        """Count leaf nodes of legal moves tree of given depth"""
+        if depth == 0:
+            return 1
+
+        self.engine.compute_legal_moves(board)
+
+        # Leaf moves don't need to be made
+        if depth == 1:
+            return board.legal_move_count()
+
+        nodes = 0
+        for encoded_move in board.legal_moves:
+            self.engine.make_move(board, encoded_move)
+            nodes += self.perft(board, depth - 1)
+            board.unmake_move()
+
+        return nodes
+
+    def divide(self, board, depth):
+        """Count leaf nodes after each root move"""
+        nodes_by_move = {}
+        self.engine.compute_legal_moves(board)
+        for encoded_move in board.legal_moves:
+            self.engine.make_move(board, encoded_move)
+            nodes_by_move[move_name(encoded_move)] = self.perft(board, depth - 1)
+            board.unmake_move()
+
+        return nodes_by_move
+
+
+def run_reference_positions(max_depth, board_type=Board, cache_capacity=0, output=sys.stdout):
+    """Check node counts of reference positions and report nodes per second"""
+    passed = True
+    total_nodes = 0
+    total_time = 0.0
+
+    pieces = PiecesCollection()
+    pieces.initialize_pieces()
+
+    for name, fen, node_counts in REFERENCE_POSITIONS:
+        for depth, expected_nodes in enumerate(node_counts[:max_depth], start=1):
+            board = board_type.from_fen(fen, pieces)
+            perft = Perft(Engine(board, pieces, None, cache_capacity))
+
+            start_time = time.perf_counter()
+            nodes = perft.perft(board, depth)
+            elapsed = time.perf_counter() - start_time
+
+            total_nodes += nodes
+            total_time += elapsed
+            result = "ok" if nodes == expected_nodes else "FAIL (expected {})".format(expected_nodes)
+            passed = passed and nodes == expected_nodes
+
+            output.write("{:<20} depth {} nodes {:>10} {:>8.3f}s {:>10.0f} nps  {}\n".format(
+                name, depth, nodes, elapsed, nodes / elapsed if elapsed else 0, result))
+
+    output.write("total nodes {} in {:.3f}s, {:.0f} nps\n".format(
+        total_nodes, total_time, total_nodes / total_time if total_time else 0))
+
+    return passed
+
+
+def run_epd(path, max_depth, board_type=Board, cache_capacity=0, output=sys.stdout):
+    """Check node counts given by D1, D2, ... operations of EPD file"""
+    passed = True
+    total_nodes = 0
+    start_time = time.perf_counter()
+
+    pieces = PiecesCollection()
+    pieces.initialize_pieces()
+
+    for line_number, (board, operations) in enumerate(read_epd(path, pieces, board_type), start=1):
+        perft = Perft(Engine(board, pieces, None, cache_capacity))
+        for depth in range(1, max_depth + 1):
+            if "D" + str(depth) not in operations:
+                break
+
+            expected_nodes = int(operations["D" + str(depth)])
+            nodes = perft.perft(board, depth)
+            total_nodes += nodes
+            if nodes != expected_nodes:
+                passed = False
+                output.write("position {} depth {} nodes {} FAIL (expected {})  {}\n".format(
+                    line_number, depth, nodes, expected_nodes, board.to_fen()))
+
+    total_time = time.perf_counter() - start_time
+    output.write("{} total nodes {} in {:.3f}s, {:.0f} nps\n".format(
+        "ok" if passed else "FAIL", total_nodes, total_time, total_nodes / total_time if total_time else 0))
+
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft correctness and speed check")
+    parser.add_argument("depth", type=int, nargs="?", default=3, help="maximum depth")
+    parser.add_argument("--bitboard", action="store_true", help="use bitboard backend")
+    parser.add_argument("--cache", type=int, default=0, help="legal moves cache capacity")
+    parser.add_argument("--divide", metavar="FEN", help="print node counts per root move of position")
+    parser.add_argument("--epd", metavar="FILE", help="check positions of EPD file with D1, D2, ... node counts")
+    args = parser.parse_args()
+
+    board_type = BitBoard if args.bitboard else Board
+
+    if args.divide:
+        pieces = PiecesCollection()
+        pieces.initialize_pieces()
+        board = board_type.from_fen(args.divide, pieces)
+        perft = Perft(Engine(board, pieces, None, args.cache))
+        nodes_by_move = perft.divide(board, args.depth)
+        for move_name, nodes in sorted(nodes_by_move.items()):
+            print(move_name, nodes)
+        print("total", sum(nodes_by_move.values()))
+        return 0
+
+    if args.epd:
+        passed = run_epd(args.epd, args.depth, board_type, args.cache)
+    else:
+        passed = run_reference_positions(args.depth, board_type, args.cache)
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,47 @@
+import argparse
+import io
+import os
+import sys
+
+from BitBoard import BitBoard
+from Board import Board
+from PgnReader import PgnReader
+from PiecesCollection import PiecesCollection
+
+# Broken games followed by valid ones, reader has to skip the broken ones and keep reading
+REGRESSION_PGN = os.path.join(os.path.dirname(os.path.abspath(__file__)), "regression.pgn")
+# Numbers of games which are expected to be skipped, games read and their moves
+EXPECTED_SKIPPED = [1, 2, 3, 4, 5]
+EXPECTED_GAMES = 3
+EXPECTED_MOVES = 26
+
+
+def check_regression_pgn(board_type, path=REGRESSION_PGN, output=sys.stdout):
+    """Read regression PGN and compare games read and skipped with expected ones"""
+    pieces = PiecesCollection()
+    pieces.initialize_pieces()
+    errors = io.StringIO()
+    reader = PgnReader(pieces, board_type, errors)
+
+    games = list(reader.games(path))
+    skipped = [int(line.split()[1]) for line in errors.getvalue().splitlines()]
+    moves = sum(len(game.moves) for game in games)
+
+    passed = skipped == EXPECTED_SKIPPED and len(games) == EXPECTED_GAMES and moves == EXPECTED_MOVES
+    output.write("{:<10} games {} skipped {} moves {}  {}\n".format(
+        board_type.__name__, len(games), skipped, moves, "ok" if passed else "FAIL"))
+
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that PGN reader skips malformed games and reads the rest")
+    parser.add_argument("--bitboard", action="store_true", help="use bitboard backend")
+    args = parser.parse_args()
+
+    passed = check_regression_pgn(BitBoard if args.bitboard else Board)
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
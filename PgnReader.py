@@ -0,0 +1,242 @@
+import argparse
+import re
+import sys
+import time
+
+from AttackTables import SQUARES
+from BitBoard import BitBoard
+from Board import Board, START_FEN
+from Engine import Engine
+from Move import KING_CASTLE, QUEEN_CASTLE, FILE_NAMES, from_square, to_square, get_flags, is_promotion, \
+    promotion_index
+from Piece import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+from PiecesCollection import PiecesCollection
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+SAN_PIECE_KINDS = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN, "K": KING}
+# Promotion pieces in order of encoded promotion index
+SAN_PROMOTION_INDEXES = {"N": 0, "B": 1, "R": 2, "Q": 3}
+SAN_PATTERN = re.compile(r"([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+
+TAG_PATTERN = re.compile(r'\[\s*(\w+)\s+"(.*)"\s*\]')
+# Comments, variation brackets, numeric annotations and other tokens of movetext
+MOVETEXT_PATTERN = re.compile(r"\{[^}]*\}?|;[^\n]*|[()]|\$\d+|[^\s{}();$]+")
+MOVE_NUMBER_PATTERN = re.compile(r"\d+\.+")
+
+
+def find_san_move(board, legal_moves, san):
+    """Get encoded legal move given in standard algebraic notation, None if no move or several moves match"""
+    san = san.rstrip("+#!?")
+    if san in ("O-O", "0-0"):
+        castling_flags = KING_CASTLE
+    elif san in ("O-O-O", "0-0-0"):
+        castling_flags = QUEEN_CASTLE
+    else:
+        castling_flags = None
+
+    if castling_flags is not None:
+        for encoded_move in legal_moves:
+            if get_flags(encoded_move) == castling_flags:
+                return encoded_move
+        return None
+
+    match = SAN_PATTERN.match(san)
+    if match is None:
+        return None
+    piece_symbol, from_file, from_rank, move_square, promotion_symbol = match.groups()
+
+    kind = SAN_PIECE_KINDS[piece_symbol] if piece_symbol else PAWN
+    move = (int(move_square[1]) - 1) * 8 + FILE_NAMES.index(move_square[0])
+    from_file = FILE_NAMES.index(from_file) if from_file else None
+    from_rank = int(from_rank) - 1 if from_rank else None
+
+    found_move = None
+    for encoded_move in legal_moves:
+        if to_square(encoded_move) != move:
+            continue
+        location = from_square(encoded_move)
+        if from_file is not None and location & 7 != from_file or \
+           from_rank is not None and location >> 3 != from_rank:
+            continue
+        if board.get_piece(SQUARES[location]).kind != kind:
+            continue
+
+        if promotion_symbol:
+            if not is_promotion(encoded_move) or \
+               promotion_index(encoded_move) != SAN_PROMOTION_INDEXES[promotion_symbol]:
+                continue
+        elif is_promotion(encoded_move):
+            continue
+
+        # Ambiguous move
+        if found_move is not None:
+            return None
+        found_move = encoded_move
+
+    return found_move
+
+
+class PgnGame:
+    def __init__(self, number, tags, start_fen, moves, result):
+        # Number of game in file, starting from 1
+        self.number = number
+        self.tags = tags
+        self.start_fen = start_fen
+        # Encoded moves
+        self.moves = moves
+        self.result = result
+
+
+class PgnReader:
+    def __init__(self, pieces, board_type=Board, error_output=sys.stderr):
+        self.pieces = pieces
+        self.board_type = board_type
+        self.error_output = error_output
+
+        # Legal moves cache is shared by all games, openings repeat a lot
+        self.engine = Engine(board_type.from_fen(START_FEN, pieces), pieces, None)
+
+        self.games_read = 0
+        self.games_skipped = 0
+        self.moves_read = 0
+        self.start_time = None
+        self.elapsed = 0.0
+
+    def games(self, pgn_file):
+        """Yield games of PGN file or path one by one, malformed games are reported and skipped"""
+        self.start_time = time.perf_counter()
+
+        for number, (tags, movetext) in enumerate(self.__raw_games(pgn_file), start=1):
+            try:
+                game = self.__replay(number, tags, movetext)
+            except Exception as error:
+                # Any error of one game must not stop reading the rest of the file
+                self.games_skipped += 1
+                if self.error_output is not None:
+                    if not isinstance(error, ValueError):
+                        error = "{}: {}".format(type(error).__name__, error)
+                    self.error_output.write("game {} skipped: {}\n".format(number, error))
+                continue
+
+            self.games_read += 1
+            self.moves_read += len(game.moves)
+            self.elapsed = time.perf_counter() - self.start_time
+            yield game
+
+        self.elapsed = time.perf_counter() - self.start_time
+
+    def positions(self, pgn_file):
+        """Yield board before every move with the move and its game.
+        The same board is changed by following moves, copy it to keep the position"""
+        for game in self.games(pgn_file):
+            board = self.board_type.from_fen(game.start_fen, self.pieces)
+            for encoded_move in game.moves:
+                yield board, encoded_move, game
+                self.engine.make_move(board, encoded_move)
+
+    def games_per_second(self):
+        return self.games_read / self.elapsed if self.elapsed else 0.0
+
+    @staticmethod
+    def __raw_games(pgn_file):
+        """Yield tags and movetext of every game, reading file line by line"""
+        if isinstance(pgn_file, str):
+            with open(pgn_file, encoding="utf-8", errors="replace") as opened_file:
+                yield from PgnReader.__raw_games(opened_file)
+            return
+
+        tags = {}
+        movetext_lines = []
+        # Open braces of multi-line comment, tags inside comments are ignored
+        comment_depth = 0
+        for line in pgn_file:
+            stripped_line = line.strip()
+            if not comment_depth and stripped_line.startswith("["):
+                # Tag after movetext starts the next game
+                if movetext_lines:
+                    yield tags, "".join(movetext_lines)
+                    tags = {}
+                    movetext_lines = []
+
+                match = TAG_PATTERN.match(stripped_line)
+                if match is not None:
+                    tags[match.group(1)] = match.group(2)
+                continue
+
+            if stripped_line.startswith("%"):
+                continue
+            if stripped_line:
+                movetext_lines.append(line)
+                comment_depth = max(0, comment_depth + line.count("{") - line.count("}"))
+
+        if tags or movetext_lines:
+            yield tags, "".join(movetext_lines)
+
+    def __replay(self, number, tags, movetext):
+        """Resolve moves of game against legal moves, raising ValueError for malformed game"""
+        start_fen = tags.get("FEN", START_FEN)
+        board = self.board_type.from_fen(start_fen, self.pieces)
+
+        moves = []
+        result = tags.get("Result", "*")
+        variation_depth = 0
+        for token in MOVETEXT_PATTERN.findall(movetext):
+            first_symbol = token[0]
+            # Skip comments, numeric annotations and variations
+            if first_symbol in "{;$":
+                continue
+            if token == "(":
+                variation_depth += 1
+                continue
+            if token == ")":
+                variation_depth -= 1
+                if variation_depth < 0:
+                    raise ValueError("unmatched variation end")
+                continue
+            if variation_depth:
+                continue
+
+            if token in RESULTS:
+                result = token
+                break
+
+            # Move number may stick to the move, e.g. 1.e4
+            san = MOVE_NUMBER_PATTERN.sub("", token, count=1)
+            if not san:
+                continue
+
+            self.engine.compute_legal_moves(board)
+            encoded_move = find_san_move(board, board.legal_moves, san)
+            if encoded_move is None:
+                raise ValueError("illegal or ambiguous move {} after {} moves".format(san, len(moves)))
+            self.engine.make_move(board, encoded_move)
+            moves.append(encoded_move)
+
+        if not moves and not tags:
+            raise ValueError("empty game")
+
+        return PgnGame(number, tags, start_fen, moves, result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay PGN file through the rules engine")
+    parser.add_argument("path", help="PGN file")
+    parser.add_argument("--bitboard", action="store_true", help="use bitboard backend")
+    args = parser.parse_args()
+
+    pieces = PiecesCollection()
+    pieces.initialize_pieces()
+    reader = PgnReader(pieces, BitBoard if args.bitboard else Board)
+
+    for game in reader.games(args.path):
+        if reader.games_read % 1000 == 0:
+            print("{} games, {:.0f} games per second".format(reader.games_read, reader.games_per_second()))
+
+    print("{} games, {} skipped, {} moves in {:.3f}s, {:.0f} games per second".format(
+        reader.games_read, reader.games_skipped, reader.moves_read, reader.elapsed, reader.games_per_second()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
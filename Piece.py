@@ -1,14 +1,23 @@
-import pygame
 import abc
 
+# Piece kinds, used to index bitboards and lookup tables
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+KINDS_NUM = 6
+
 
 class Piece:
+    kind = None
 
     def __init__(self, colour=None, image_filename=None, moved=None):
         self.colour = colour
-        self.image = pygame.image.load(image_filename)
+        # Image is loaded by UI when there is a window to draw on
+        self.image_filename = image_filename
+        self.image = None
         self.moved = moved
 
+        # Index of piece kind and colour: white pieces first, then black
+        self.index = self.kind + (KINDS_NUM if colour == "black" else 0)
+
     def get_colour(self):
         """"Get piece colour"""
         return self.colour
@@ -17,6 +26,18 @@ class Piece:
         """"Get piece image"""
         return self.image
 
+    def get_image_filename(self):
+        """"Get name of piece image file"""
+        return self.image_filename
+
+    def set_image(self, image):
+        """"Attach loaded piece image"""
+        self.image = image
+
+    def get_index(self):
+        """"Get index of piece kind and colour"""
+        return self.index
+
     def is_moved(self):
         """"Return information about has been piece moved or not"""
         return self.moved
@@ -2,6 +2,7 @@ from Bishop import Bishop
 from King import King
 from Knight import Knight
 from Pawn import Pawn
+from Piece import KINDS_NUM
 from Queen import Queen
 from Rook import Rook
 
@@ -9,39 +10,52 @@ from Rook import Rook
 class PiecesCollection:
     def __init__(self):
         self.pieces = None
+        self.pieces_by_index = None
 
     def initialize_pieces(self):
         """"Create all pieces"""
-        images_dir = "D:\\users\\akhmatov-nv\\PycharmProjects\\chess\\images\\"
-        pieces = {"w_pawn": Pawn("white", images_dir + "w_pawn.png", False),
-                  "w_pawn_moved": Pawn("white", images_dir + "w_pawn.png", True),
-                  "b_pawn": Pawn("black", images_dir + "b_pawn.png", False),
-                  "b_pawn_moved": Pawn("black", images_dir + "b_pawn.png", True),
-
-                  "w_king": King("white", images_dir + "w_king.png", False),
-                  "w_king_moved": King("white", images_dir + "w_king.png", True),
-                  "b_king": King("black", images_dir + "b_king.png", False),
-                  "b_king_moved": King("black", images_dir + "b_king.png", True),
-
-                  "w_rook": Rook("white", images_dir + "w_rook.png", False),
-                  "w_rook_moved": Rook("white", images_dir + "w_rook.png", True),
-                  "b_rook": Rook("black", images_dir + "b_rook.png", False),
-                  "b_rook_moved": Rook("black", images_dir + "b_rook.png", True),
-
-                  "w_knight": Knight("white", images_dir + "w_knight.png", True),
-                  "b_knight": Knight("black", images_dir + "b_knight.png", True),
-
-                  "w_bishop": Bishop("white", images_dir + "w_bishop.png", True),
-                  "b_bishop": Bishop("black", images_dir + "b_bishop.png", True),
-
-                  "w_queen": Queen("white", images_dir + "w_queen.png", True),
-                  "b_queen": Queen("black", images_dir + "b_queen.png", True)
+        pieces = {"w_pawn": Pawn("white", "w_pawn.png", False),
+                  "w_pawn_moved": Pawn("white", "w_pawn.png", True),
+                  "b_pawn": Pawn("black", "b_pawn.png", False),
+                  "b_pawn_moved": Pawn("black", "b_pawn.png", True),
+
+                  "w_king": King("white", "w_king.png", False),
+                  "w_king_moved": King("white", "w_king.png", True),
+                  "b_king": King("black", "b_king.png", False),
+                  "b_king_moved": King("black", "b_king.png", True),
+
+                  "w_rook": Rook("white", "w_rook.png", False),
+                  "w_rook_moved": Rook("white", "w_rook.png", True),
+                  "b_rook": Rook("black", "b_rook.png", False),
+                  "b_rook_moved": Rook("black", "b_rook.png", True),
+
+                  "w_knight": Knight("white", "w_knight.png", True),
+                  "b_knight": Knight("black", "b_knight.png", True),
+
+                  "w_bishop": Bishop("white", "w_bishop.png", True),
+                  "b_bishop": Bishop("black", "b_bishop.png", True),
+
+                  "w_queen": Queen("white", "w_queen.png", True),
+                  "b_queen": Queen("black", "b_queen.png", True)
                   }
         self.pieces = pieces
 
+        # Lookup of pieces by their index and moved flag
+        self.pieces_by_index = [[None, None] for _ in range(2 * KINDS_NUM)]
+        for piece in pieces.values():
+            self.pieces_by_index[piece.get_index()][piece.is_moved()] = piece
+
     def get_by_name(self, piece_name):
         return self.pieces[piece_name]
 
+    def get_all(self):
+        """Return all piece instances"""
+        return list(self.pieces.values())
+
+    def get_by_index(self, index, moved):
+        """Return piece instance by its index and moved flag"""
+        return self.pieces_by_index[index][moved]
+
     def get_moved_version(self, piece):
         """Return moved instance of piece"""
         moved_piece = None
@@ -0,0 +1,192 @@
+import os
+
+import numpy as np
+
+from Board import Board, FEN_CASTLING, fen_placement
+from Move import square_name
+
+# File starts with header: magic, format version, number of policy slots per record and reserved bytes
+MAGIC = b"CHRB"
+VERSION = 1
+HEADER_DTYPE = np.dtype([("magic", "S4"), ("version", "<u2"), ("policy_slots", "<u2"), ("reserved", "<u8")])
+HEADER_BYTES = HEADER_DTYPE.itemsize
+
+# Flags: bit 0 is black to move, bits 1-4 castling rights, bits 5-8 un passant file + 1 or 0
+BLACK_TO_MOVE = 1
+CASTLING_SHIFT = 1
+UN_PASSANT_SHIFT = 5
+
+# Policy slot without move
+NO_POLICY_INDEX = 0xFFFF
+
+# Records are flushed to file in chunks
+WRITE_CHUNK = 4096
+
+
+def record_dtype(policy_slots=0):
+    """Get record layout: placement with piece index + 1 of two squares per byte, lower square in low nibble,
+    flags, encoded move, outcome for side to move, halfmove clock and optional sparse policy target"""
+    fields = [("placement", np.uint8, 32), ("flags", "<u2"), ("move", "<u2"), ("outcome", np.int8),
+              ("halfmove_clock", np.uint8)]
+    if policy_slots:
+        fields += [("policy_indexes", "<u2", policy_slots), ("policy_values", "<f2", policy_slots)]
+
+    return np.dtype(fields)
+
+
+def pack_squares(squares):
+    """Pack (N, 64) piece index + 1 by square into (N, 32) placement"""
+    return squares[:, 0::2] | squares[:, 1::2] << 4
+
+
+def unpack_squares(placement):
+    """Unpack (N, 32) placement into (N, 64) piece index + 1 by square"""
+    squares = np.empty((len(placement), 64), dtype=np.uint8)
+    squares[:, 0::2] = placement & 15
+    squares[:, 1::2] = placement >> 4
+
+    return squares
+
+
+def record_fen(record):
+    """Get FEN of position in record"""
+    squares = unpack_squares(record["placement"].reshape(1, 32))[0]
+
+    flags = int(record["flags"])
+    black_to_move = flags & BLACK_TO_MOVE
+    castling_rights = flags >> CASTLING_SHIFT
+    castling = "".join(symbol for symbol, (castling_right, king_location, rook_location) in FEN_CASTLING
+                       if castling_rights & castling_right) or "-"
+    un_passant_file = flags >> UN_PASSANT_SHIFT & 15
+    if un_passant_file:
+        un_passant = square_name((5 if not black_to_move else 2, un_passant_file - 1))
+    else:
+        un_passant = "-"
+
+    return "{} {} {} {} {} 1".format(fen_placement(squares), "b" if black_to_move else "w", castling, un_passant,
+                                     int(record["halfmove_clock"]))
+
+
+def record_board(record, pieces, board_type=Board):
+    """Create board with position of record"""
+    return board_type.from_fen(record_fen(record), pieces)
+
+
+class ReplayBuffer:
+    def __init__(self, path):
+        """Open records file for reading, records are read from disk only when accessed"""
+        self.path = path
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) != 1 or header[0]["magic"] != MAGIC or header[0]["version"] != VERSION:
+            raise ValueError("not a replay buffer file: " + path)
+
+        self.policy_slots = int(header[0]["policy_slots"])
+        self.dtype = record_dtype(self.policy_slots)
+        records_num = (os.path.getsize(path) - HEADER_BYTES) // self.dtype.itemsize
+        if records_num:
+            self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=HEADER_BYTES, shape=(records_num,))
+        else:
+            self.records = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def sample(self, batch_size, generator=None):
+        """Get copy of randomly chosen records, only their pages are read"""
+        if not len(self.records):
+            raise ValueError("no records to sample in replay buffer: " + self.path)
+        if generator is None:
+            generator = np.random.default_rng()
+        # Sorted indexes read file in order
+        indexes = np.sort(generator.integers(0, len(self.records), batch_size))
+
+        return self.records[indexes]
+
+    def squares(self, records):
+        """Get (N, 64) piece index + 1 by square of records"""
+        return unpack_squares(records["placement"])
+
+
+class ReplayBufferWriter:
+    def __init__(self, path, policy_slots=0):
+        """Open records file for appending, new file gets header"""
+        self.path = path
+        self.policy_slots = policy_slots
+        self.dtype = record_dtype(policy_slots)
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_BYTES:
+            header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)[0]
+            if header["magic"] != MAGIC or header["version"] != VERSION or header["policy_slots"] != policy_slots:
+                raise ValueError("replay buffer file has different format: " + path)
+            self.file = open(path, "ab")
+        else:
+            self.file = open(path, "wb")
+            header = np.zeros(1, dtype=HEADER_DTYPE)
+            header["magic"] = MAGIC
+            header["version"] = VERSION
+            header["policy_slots"] = policy_slots
+            self.file.write(header.tobytes())
+
+        # Chunk of records waiting to be written
+        self.chunk = np.zeros(WRITE_CHUNK, dtype=self.dtype)
+        self.chunk_size = 0
+        self.records_written = 0
+
+    def append_position(self, board, encoded_move, outcome, policy=None):
+        """Add position before move with outcome for side to move and policy target as pairs
+        of policy index and probability, the most probable ones fill the slots"""
+        record = self.chunk[self.chunk_size]
+        squares = np.array([board.piece_indexes()], dtype=np.uint8)
+        record["placement"] = pack_squares(squares)[0]
+
+        un_passant_attack = board.get_un_passant_attack()
+        record["flags"] = (board.current_colour() != "white") | board.get_castling_rights() << CASTLING_SHIFT | \
+            (un_passant_attack[1] + 1 if un_passant_attack is not None else 0) << UN_PASSANT_SHIFT
+        record["move"] = encoded_move
+        record["outcome"] = outcome
+        record["halfmove_clock"] = min(board.halfmove_clock, 255)
+
+        if self.policy_slots:
+            record["policy_indexes"] = NO_POLICY_INDEX
+            record["policy_values"] = 0
+            if policy is not None:
+                policy = sorted(policy, key=lambda pair: pair[1], reverse=True)[:self.policy_slots]
+                for slot, (policy_index, probability) in enumerate(policy):
+                    record["policy_indexes"][slot] = policy_index
+                    record["policy_values"][slot] = probability
+
+        self.chunk_size += 1
+        if self.chunk_size == WRITE_CHUNK:
+            self.flush()
+
+    def append_self_play(self, records):
+        """Add position records made by SelfPlay workers"""
+        self.flush()
+        packed = np.zeros(len(records), dtype=self.dtype)
+        packed["placement"] = pack_squares(records["squares"])
+        un_passant = records["un_passant"].astype(np.int32) + 1
+        packed["flags"] = records["side_to_move"].astype(np.uint16) | \
+            records["castling"].astype(np.uint16) << CASTLING_SHIFT | un_passant.astype(np.uint16) << UN_PASSANT_SHIFT
+        packed["move"] = records["move"]
+        packed["outcome"] = records["outcome"]
+        packed["halfmove_clock"] = records["halfmove_clock"]
+        if self.policy_slots:
+            packed["policy_indexes"] = NO_POLICY_INDEX
+
+        self.file.write(packed.tobytes())
+        self.records_written += len(packed)
+
+    def flush(self):
+        """Write waiting records to file"""
+        if self.chunk_size:
+            self.file.write(self.chunk[:self.chunk_size].tobytes())
+            self.records_written += self.chunk_size
+            self.chunk_size = 0
+        self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
@@ -1,62 +1,22 @@
-from Piece import Piece
+from AttackTables import ROOK_RAYS
+from Piece import Piece, ROOK
 
 
 class Rook(Piece):
+    kind = ROOK
+
     def __init__(self, colour, picture, moved):
         super().__init__(colour, picture, moved)
 
-    @staticmethod
-    def __calculate_moves(board, position):
-        """"Return piece moves"""
-        rank, file = position
-        possible_moves = [[], [], [], []]
-
-        i = 1
-        while True:
-            next_position = (rank + i, file)
-            if board.on_board(next_position):
-                possible_moves[0].append(next_position)
-                i += 1
-            else:
-                break
-
-        i = -1
-        while True:
-            next_position = (rank + i, file)
-            if board.on_board(next_position):
-                possible_moves[1].append(next_position)
-                i -= 1
-            else:
-                break
-
-        j = 1
-        while True:
-            next_position = (rank, file + j)
-            if board.on_board(next_position):
-                possible_moves[2].append(next_position)
-                j += 1
-            else:
-                break
-
-        j = -1
-        while True:
-            next_position = (rank, file + j)
-            if board.on_board(next_position):
-                possible_moves[3].append(next_position)
-                j -= 1
-            else:
-                break
-
-        return possible_moves
-
     def get_moves(self, board, location):
         """"Compute piece possible moves"""
         position_moves = []
         attacking_moves = []
 
-        available_moves = self.__calculate_moves(board, location)
+        rank, file = location
 
-        for direction in available_moves:
+        # rays of squares from location, nearest square first
+        for direction in ROOK_RAYS[rank * 8 + file]:
             for next_position in direction:
                 piece_on = board.get_piece(next_position)
                 # is there a piece
@@ -0,0 +1,273 @@
+import time
+
+from AttackTables import SQUARES
+from Evaluation import PIECE_VALUES, static_exchange
+from Move import CAPTURE, PROMOTION, UN_PASSANT_CAPTURE, is_capture, is_promotion
+from MoveOrdering import MoveOrdering, MAX_PLY
+from Piece import PAWN, QUEEN
+from TranspositionTable import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+
+MAX_DEPTH = 64
+INFINITE_SCORE = 1000000
+# Score of giving mate now, mates further away score less
+MATE_SCORE = 100000
+# Margin for positional gains in delta pruning
+DELTA_MARGIN = 200
+
+
+class SearchResult:
+    def __init__(self, best_move, score, depth, nodes, elapsed, principal_variation):
+        # Encoded best move, None if there are no legal moves
+        self.best_move = best_move
+        # Score in centipawns from side to move point of view
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.nodes_per_second = nodes / elapsed if elapsed > 0 else 0.0
+        self.principal_variation = principal_variation
+
+    def is_mate_score(self):
+        """Check if score means forced mate"""
+        return abs(self.score) >= MATE_SCORE - MAX_DEPTH
+
+
+class Search:
+    def __init__(self, engine, transposition_table=None, stop_event=None):
+        self.engine = engine
+        # Results of searched positions, shared between searches
+        self.transposition_table = transposition_table if transposition_table is not None else TranspositionTable()
+        self.move_ordering = MoveOrdering()
+        # Event which interrupts search when set from another thread or process
+        self.stop_event = stop_event
+
+        self.nodes = 0
+        self.deadline = None
+        self.node_limit = None
+        self.stopped = False
+
+    def search(self, board, depth=None, time_limit=None, start_depth=1, node_limit=None, soft_time_limit=None,
+               info_callback=None, skip_pattern=None, table_age=None):
+        """Find best move by iterative deepening up to depth or until time or node limit runs out.
+        Time limits are in seconds, no new iteration starts after soft time limit.
+        Info callback gets result of every finished iteration.
+        Skip pattern is pair of block size and phase, iterations in every other block are left out.
+        Table age is given when several searches share the table, by default this search starts a new age"""
+        if depth is None and time_limit is None and node_limit is None and self.stop_event is None:
+            raise ValueError("search needs depth, time or node limit or stop event")
+        if depth is not None and depth < 1:
+            raise ValueError("search depth must be at least 1")
+
+        start_time = time.perf_counter()
+        self.deadline = start_time + time_limit if time_limit is not None else None
+        self.node_limit = node_limit
+        self.nodes = 0
+        self.stopped = False
+        if table_age is None:
+            self.transposition_table.new_search()
+        else:
+            self.transposition_table.set_age(table_age)
+
+        result = None
+        max_depth = min(depth if depth is not None else MAX_DEPTH, MAX_DEPTH)
+        for current_depth in range(min(start_depth, max_depth), max_depth + 1):
+            # Helpers of parallel search skip blocks of iterations, the last one is always searched
+            if skip_pattern is not None and current_depth < max_depth:
+                skip_size, skip_phase = skip_pattern
+                if (current_depth + skip_phase) // skip_size % 2:
+                    continue
+
+            # Best move of previous iteration is searched first as hash move
+            iteration_variation = []
+            score = self.__negamax(board, current_depth, -INFINITE_SCORE, INFINITE_SCORE, 0, iteration_variation)
+
+            # Result of interrupted iteration is incomplete, keep the previous one
+            if self.stopped and result is not None:
+                break
+
+            principal_variation = iteration_variation
+            best_move = principal_variation[0] if principal_variation else None
+            elapsed = time.perf_counter() - start_time
+            result = SearchResult(best_move, score, current_depth, self.nodes, elapsed, principal_variation)
+            if info_callback is not None and not self.stopped:
+                info_callback(result)
+
+            # No need to search deeper if there are no moves or mate is found
+            if self.stopped or best_move is None or result.is_mate_score():
+                break
+            # Next iteration most likely won't finish in time left
+            if soft_time_limit is not None and elapsed >= soft_time_limit:
+                break
+
+        # Restore legal moves of the root position changed by search
+        self.engine.compute_legal_moves(board)
+
+        # Search stopped before the first move was searched still gives a legal move
+        if result.best_move is None and board.has_legal_move():
+            result.best_move = board.legal_moves[0]
+            result.principal_variation = [result.best_move]
+
+        return result
+
+    def new_game(self):
+        """Forget results of previous game"""
+        self.transposition_table.clear()
+        self.move_ordering.clear()
+
+    def __time_out(self):
+        """Check node limit on every node, clock and stop event from time to time"""
+        if self.node_limit is not None and self.nodes > self.node_limit:
+            self.stopped = True
+        elif self.nodes % 1024 == 0:
+            if self.deadline is not None and time.perf_counter() >= self.deadline or \
+               self.stop_event is not None and self.stop_event.is_set():
+                self.stopped = True
+
+        return self.stopped
+
+    def __negamax(self, board, depth, alpha, beta, ply, principal_variation):
+        """Alpha-beta search returning score from side to move point of view and filling its variation"""
+        self.nodes += 1
+        if self.__time_out():
+            return 0
+
+        # Resolve captures before evaluating the position
+        if depth == 0 or ply >= MAX_PLY:
+            return self.__quiescence(board, alpha, beta, ply)
+
+        key = board.hash()
+        hash_move = 0
+        entry = self.transposition_table.probe(key)
+        if entry is not None:
+            hash_move, entry_depth, bound, entry_score = entry
+            # Root is always searched to get the best move and variation
+            if ply > 0 and entry_depth >= depth:
+                entry_score = self.__score_from_table(entry_score, ply)
+                if bound == EXACT or (bound == LOWER_BOUND and entry_score >= beta) or \
+                   (bound == UPPER_BOUND and entry_score <= alpha):
+                    return entry_score
+
+        self.engine.compute_legal_moves(board)
+        legal_moves = board.legal_moves
+
+        # Mate or stalemate
+        if not legal_moves:
+            colour = board.current_colour()
+            if board.is_attacked(board.king_location_by_colour(colour), board.opposite_colour()):
+                return -MATE_SCORE + ply
+            return 0
+
+        # Search moves most likely to cause cutoff first
+        legal_moves = self.move_ordering.order_moves(board, legal_moves, hash_move, ply)
+
+        best_move = 0
+        for encoded_move in legal_moves:
+            child_variation = []
+            self.engine.make_move(board, encoded_move)
+            score = -self.__negamax(board, depth - 1, -beta, -alpha, ply + 1, child_variation)
+            board.unmake_move()
+
+            if self.stopped:
+                return 0
+
+            if score > alpha:
+                alpha = score
+                best_move = encoded_move
+                principal_variation[:] = [encoded_move] + child_variation
+                if alpha >= beta:
+                    if not is_capture(encoded_move) and not is_promotion(encoded_move):
+                        self.move_ordering.update_quiet_cutoff(board.current_colour(), encoded_move, depth, ply)
+                    break
+
+        if alpha >= beta:
+            bound = LOWER_BOUND
+        elif best_move:
+            bound = EXACT
+        else:
+            bound = UPPER_BOUND
+        self.transposition_table.store(key, best_move, depth, bound, self.__score_to_table(alpha, ply))
+
+        return alpha
+
+    def __quiescence(self, board, alpha, beta, ply):
+        """Search captures and promotions only until position is quiet"""
+        self.nodes += 1
+        if self.__time_out():
+            return 0
+
+        colour = board.current_colour()
+        in_check = board.is_attacked(board.king_location_by_colour(colour), board.opposite_colour())
+
+        # Side to move can avoid captures unless it is in check
+        stand_pat = board.evaluate()
+        if ply >= MAX_PLY or (not in_check and stand_pat >= beta):
+            return stand_pat
+        if not in_check:
+            alpha = max(alpha, stand_pat)
+
+        self.engine.compute_legal_moves(board)
+        legal_moves = board.legal_moves
+
+        # All moves are searched to escape check
+        if in_check:
+            if not legal_moves:
+                return -MATE_SCORE + ply
+        else:
+            legal_moves = [move for move in legal_moves if move >> 12 & (CAPTURE | PROMOTION)]
+
+        # Moves are decoded inline in this loop, it runs for every quiescence move
+        for encoded_move in self.move_ordering.order_moves(board, legal_moves, 0, ply):
+            flags = encoded_move >> 12
+            if not in_check:
+                location, move = SQUARES[encoded_move & 63], SQUARES[encoded_move >> 6 & 63]
+
+                # Delta pruning: move can't raise score to alpha even winning the taken piece
+                if flags == UN_PASSANT_CAPTURE:
+                    gain = PIECE_VALUES[PAWN]
+                elif flags & CAPTURE:
+                    gain = PIECE_VALUES[board.get_piece(move).kind]
+                else:
+                    gain = 0
+                if flags & PROMOTION:
+                    gain += PIECE_VALUES[QUEEN] - PIECE_VALUES[PAWN]
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+
+                # Skip captures losing material in exchange
+                if flags & CAPTURE and flags != UN_PASSANT_CAPTURE and not flags & PROMOTION and \
+                   static_exchange(board, location, move) < 0:
+                    continue
+
+            self.engine.make_move(board, encoded_move)
+            score = -self.__quiescence(board, -beta, -alpha, ply + 1)
+            board.unmake_move()
+
+            if self.stopped:
+                return 0
+
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+        return alpha
+
+    @staticmethod
+    def __score_to_table(score, ply):
+        """Store mate scores as distance from the position instead of the root"""
+        if score >= MATE_SCORE - MAX_DEPTH:
+            score += ply
+        elif score <= -MATE_SCORE + MAX_DEPTH:
+            score -= ply
+
+        return score
+
+    @staticmethod
+    def __score_from_table(score, ply):
+        """Convert mate scores back to distance from the root"""
+        if score >= MATE_SCORE - MAX_DEPTH:
+            score -= ply
+        elif score <= -MATE_SCORE + MAX_DEPTH:
+            score += ply
+
+        return score
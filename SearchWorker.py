@@ -0,0 +1,70 @@
+import threading
+
+from Engine import Engine
+from Search import Search
+
+
+class SearchWorker:
+    def __init__(self, pieces, transposition_table=None):
+        self.pieces = pieces
+        self.stop_event = threading.Event()
+        # Search is kept between moves to reuse transposition table and move ordering
+        self.search = Search(None, transposition_table, self.stop_event)
+
+        self.thread = None
+        self.result = None
+        # Result of the last finished iteration, for display while searching
+        self.info = None
+
+    def start(self, board, depth=None, time_limit=None, node_limit=None, soft_time_limit=None, info_callback=None):
+        """Start searching copy of the board in background thread"""
+        if self.is_running():
+            raise RuntimeError("search is already running")
+
+        # Caller keeps using its board while the copy is searched
+        board_copy = board.copy()
+        self.search.engine = Engine(board_copy, self.pieces, None)
+        self.stop_event.clear()
+        self.result = None
+        self.info = None
+
+        self.thread = threading.Thread(target=self.__run, daemon=True,
+                                       args=(board_copy, depth, time_limit, node_limit, soft_time_limit,
+                                             info_callback))
+        self.thread.start()
+
+    def __run(self, board, depth, time_limit, node_limit, soft_time_limit, info_callback):
+        """Search in background thread"""
+        def report(info):
+            self.info = info
+            if info_callback is not None:
+                info_callback(info)
+
+        self.result = self.search.search(board, depth, time_limit, node_limit=node_limit,
+                                         soft_time_limit=soft_time_limit, info_callback=report)
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def stop(self):
+        """Ask search to finish, result of the last finished iteration is kept"""
+        self.stop_event.set()
+
+    def wait(self, timeout=None):
+        """Wait for search to finish and take its result, None if it is still running"""
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+        return self.poll()
+
+    def poll(self):
+        """Take result once search has finished, None while it is running or when result was taken"""
+        if self.is_running():
+            return None
+
+        result, self.result = self.result, None
+        return result
+
+    def new_game(self):
+        """Forget results of previous game"""
+        self.search.new_game()
@@ -0,0 +1,280 @@
+import argparse
+import multiprocessing
+import random
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ChessEnv import ChessEnv, move_to_action, WHITE_WIN, BLACK_WIN
+from Engine import Engine
+from Search import Search
+from TranspositionTable import TranspositionTable
+
+# Position record: piece index + 1 by square, 0 for empty square, castling rights bits, un passant file
+# or -1, halfmove clock up to 255, encoded move made in position, outcome for side to move and flags
+POSITION_DTYPE = np.dtype([("squares", np.uint8, 64), ("side_to_move", np.uint8), ("castling", np.uint8),
+                           ("un_passant", np.int8), ("halfmove_clock", np.uint8), ("move", np.uint16),
+                           ("outcome", np.int8), ("flags", np.uint8)])
+# Flag of the last position of a game
+GAME_END = 1
+
+# Ring header holds write and read counters of records
+HEADER_BYTES = 16
+# Pause of worker waiting for free space in its ring, in seconds
+BACK_PRESSURE_DELAY = 0.001
+
+
+class RingBuffer:
+    def __init__(self, capacity, name=None):
+        """Create ring of position records in shared memory, or attach to existing one by name"""
+        self.capacity = capacity
+        size = HEADER_BYTES + capacity * POSITION_DTYPE.itemsize
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.name = self.memory.name
+
+        # One process writes and one reads, each moves only its own counter
+        self.counters = np.ndarray(2, dtype=np.uint64, buffer=self.memory.buf)
+        self.records = np.ndarray(capacity, dtype=POSITION_DTYPE, buffer=self.memory.buf, offset=HEADER_BYTES)
+        if name is None:
+            self.counters[:] = 0
+
+    def free_space(self):
+        return self.capacity - int(self.counters[0] - self.counters[1])
+
+    def write(self, records):
+        """Write as many records as fit, get number of written records"""
+        count = min(len(records), self.free_space())
+        start = int(self.counters[0])
+        for offset in range(count):
+            self.records[(start + offset) % self.capacity] = records[offset]
+        # Records are visible to reader only after counter moves
+        self.counters[0] = start + count
+
+        return count
+
+    def read(self):
+        """Take copy of all written records"""
+        start, end = int(self.counters[1]), int(self.counters[0])
+        indexes = np.arange(start, end) % self.capacity
+        records = self.records[indexes]
+        self.counters[1] = end
+
+        return records
+
+    def close(self, unlink=False):
+        """Release shared memory, the creating process unlinks it"""
+        del self.counters
+        del self.records
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def random_policy(board, legal_moves, generator):
+    """Choose random legal move"""
+    return generator.choice(legal_moves)
+
+
+class SearchPolicy:
+    def __init__(self, depth=None, node_limit=None, hash_mb=16):
+        # Workers can't be stopped in the middle of a move, so search must be limited
+        if depth is None and node_limit is None:
+            raise ValueError("search policy needs depth or node limit")
+        if depth is not None and depth < 1:
+            raise ValueError("search depth must be at least 1")
+        if node_limit is not None and node_limit < 1:
+            raise ValueError("node limit must be at least 1")
+        self.depth = depth
+        self.node_limit = node_limit
+        self.hash_mb = hash_mb
+        # Search is created in worker process on first move
+        self.search = None
+
+    def __call__(self, board, legal_moves, generator):
+        """Choose move found by search"""
+        if self.search is None:
+            self.search = Search(None, TranspositionTable(self.hash_mb))
+        self.search.engine = Engine(board, board.pieces, None)
+        result = self.search.search(board, self.depth, node_limit=self.node_limit)
+
+        return result.best_move if result.best_move is not None else generator.choice(legal_moves)
+
+    def __getstate__(self):
+        # Worker processes get settings only
+        state = self.__dict__.copy()
+        state["search"] = None
+        return state
+
+
+def position_record(board, encoded_move):
+    """Make record of position before move"""
+    record = np.zeros((), dtype=POSITION_DTYPE)
+    record["squares"] = board.piece_indexes()
+    record["side_to_move"] = board.current_colour() != "white"
+    record["castling"] = board.get_castling_rights()
+    un_passant_attack = board.get_un_passant_attack()
+    record["un_passant"] = un_passant_attack[1] if un_passant_attack is not None else -1
+    record["halfmove_clock"] = min(board.halfmove_clock, 255)
+    record["move"] = encoded_move
+
+    return record
+
+
+def self_play_worker(worker_index, ring_name, capacity, policy, max_plies, seed, stop_event):
+    """Play games until stopped, writing positions of every finished game into the ring"""
+    ring = RingBuffer(capacity, ring_name)
+    generator = random.Random(seed + worker_index)
+    env = ChessEnv(max_plies=max_plies)
+
+    try:
+        while not stop_event.is_set():
+            board = env.reset()
+            records = []
+            done = False
+            while not done:
+                encoded_move = policy(board, board.legal_moves, generator)
+                records.append(position_record(board, encoded_move))
+                board, reward, done, info = env.step(move_to_action(encoded_move))
+
+            # Outcome from point of view of side to move in each position
+            for record in records:
+                if env.result == WHITE_WIN:
+                    record["outcome"] = 1 if record["side_to_move"] == 0 else -1
+                elif env.result == BLACK_WIN:
+                    record["outcome"] = -1 if record["side_to_move"] == 0 else 1
+            if records:
+                records[-1]["flags"] = GAME_END
+
+            # Back-pressure: wait while the reader frees space, it keeps reading until workers exit
+            written = 0
+            while written < len(records):
+                written += ring.write(records[written:])
+                if written < len(records):
+                    time.sleep(BACK_PRESSURE_DELAY)
+    finally:
+        ring.close()
+
+
+class SelfPlay:
+    def __init__(self, workers_num=None, policy=random_policy, ring_capacity=65536, max_plies=400, seed=0):
+        self.workers_num = workers_num or multiprocessing.cpu_count()
+        self.policy = policy
+        self.ring_capacity = ring_capacity
+        self.max_plies = max_plies
+        self.seed = seed
+
+        self.rings = []
+        self.processes = []
+        self.stop_event = multiprocessing.Event()
+
+        self.games = 0
+        self.positions = 0
+        self.start_time = None
+
+    def start(self):
+        """Start worker processes, each with its own ring"""
+        self.stop_event.clear()
+        self.start_time = time.perf_counter()
+        for worker_index in range(self.workers_num):
+            ring = RingBuffer(self.ring_capacity)
+            process = multiprocessing.Process(target=self_play_worker, daemon=True,
+                                              args=(worker_index, ring.name, self.ring_capacity, self.policy,
+                                                    self.max_plies, self.seed, self.stop_event))
+            process.start()
+            self.rings.append(ring)
+            self.processes.append(process)
+
+    def drain(self):
+        """Take records written by all workers so far"""
+        records = np.concatenate([ring.read() for ring in self.rings]) if self.rings else \
+            np.zeros(0, dtype=POSITION_DTYPE)
+        self.positions += len(records)
+        self.games += int(np.count_nonzero(records["flags"] & GAME_END))
+
+        return records
+
+    def __check_workers(self):
+        """Raise if a worker process has exited before being stopped"""
+        for worker_index, process in enumerate(self.processes):
+            if not process.is_alive():
+                raise RuntimeError("self-play worker {} exited with code {}".format(worker_index, process.exitcode))
+
+    def run(self, games_num, consumer=None, report_interval=None, output=sys.stdout):
+        """Play at least games_num games, passing drained records to consumer, e.g. file or replay buffer writer"""
+        self.start()
+        last_report = time.perf_counter()
+        try:
+            while self.games < games_num:
+                records = self.drain()
+                if len(records):
+                    if consumer is not None:
+                        consumer(records)
+                else:
+                    self.__check_workers()
+                    time.sleep(BACK_PRESSURE_DELAY * 10)
+
+                if report_interval is not None and time.perf_counter() - last_report >= report_interval:
+                    last_report = time.perf_counter()
+                    self.report(output)
+        finally:
+            # Games finished after the last drain are kept as well
+            records = self.stop()
+            if len(records) and consumer is not None:
+                consumer(records)
+
+    def stop(self):
+        """Ask workers to finish current games, wait for them and free rings.
+        Get records written since the last drain"""
+        self.stop_event.set()
+        # Workers waiting for free space finish only while rings are read
+        drained = [self.drain()]
+        while any(process.is_alive() for process in self.processes):
+            time.sleep(BACK_PRESSURE_DELAY * 10)
+            drained.append(self.drain())
+        for process in self.processes:
+            process.join()
+        drained.append(self.drain())
+
+        for ring in self.rings:
+            ring.close(unlink=True)
+        self.processes = []
+        self.rings = []
+
+        return np.concatenate(drained)
+
+    def elapsed(self):
+        return time.perf_counter() - self.start_time if self.start_time is not None else 0.0
+
+    def games_per_second(self):
+        return self.games / self.elapsed() if self.elapsed() else 0.0
+
+    def positions_per_second(self):
+        return self.positions / self.elapsed() if self.elapsed() else 0.0
+
+    def report(self, output=sys.stdout):
+        output.write("{} games, {} positions in {:.1f}s, {:.1f} games per second, {:.0f} positions per second\n".format(
+            self.games, self.positions, self.elapsed(), self.games_per_second(), self.positions_per_second()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play games generator")
+    parser.add_argument("games", type=int, nargs="?", default=100, help="number of games")
+    parser.add_argument("--workers", type=int, help="number of worker processes, all cores by default")
+    parser.add_argument("--depth", type=int, help="play moves found by search of given depth instead of random")
+    parser.add_argument("--max-plies", type=int, default=400, help="game length after which it is a draw")
+    args = parser.parse_args()
+
+    policy = SearchPolicy(args.depth) if args.depth is not None else random_policy
+    self_play = SelfPlay(args.workers, policy, max_plies=args.max_plies)
+    self_play.run(args.games, report_interval=1.0)
+    self_play.report()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
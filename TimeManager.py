@@ -0,0 +1,29 @@
+# Moves the rest of the clock is split across when moves to go are unknown
+DEFAULT_MOVES_TO_GO = 30
+# Time kept for move transmission and other overhead, in seconds
+MOVE_OVERHEAD = 0.05
+# Share of increment spent on every move
+INCREMENT_SHARE = 0.75
+# Hard limit may exceed the planned time this many times, but never takes more than max share of the clock
+HARD_LIMIT_FACTOR = 4
+MAX_CLOCK_SHARE = 0.5
+MIN_TIME = 0.01
+
+
+class TimeManager:
+    def __init__(self, moves_to_go=DEFAULT_MOVES_TO_GO, move_overhead=MOVE_OVERHEAD):
+        self.moves_to_go = moves_to_go
+        self.move_overhead = move_overhead
+
+    def allocate(self, time_left, increment=0.0, moves_to_go=None):
+        """Get soft and hard time limits in seconds for next move from clock time and increment"""
+        available = max(time_left - self.move_overhead, 0.0)
+        moves = max(1, moves_to_go if moves_to_go else self.moves_to_go)
+
+        # Last move before time control can use the whole clock
+        max_time = available if moves == 1 else available * MAX_CLOCK_SHARE
+        soft_limit = available / moves + increment * INCREMENT_SHARE
+        hard_limit = min(soft_limit * HARD_LIMIT_FACTOR, max_time + increment * INCREMENT_SHARE, available)
+        soft_limit = min(soft_limit, hard_limit)
+
+        return max(soft_limit, MIN_TIME), max(hard_limit, MIN_TIME)
@@ -0,0 +1,117 @@
+from array import array
+
+# Bound of stored score, zero marks empty entry
+EXACT = 1
+LOWER_BOUND = 2
+UPPER_BOUND = 3
+
+ENTRY_BYTES = 16
+BUCKET_ENTRIES = 2
+AGE_MASK = 63
+SCORE_OFFSET = 1 << 31
+# Table is zeroed in chunks of this many bytes to avoid a second full-size buffer
+CLEAR_CHUNK_BYTES = 1 << 20
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16, buffer=None):
+        self.size_mb = size_mb
+        self.buckets_num = 0
+
+        # Entry is two 64-bit words: key xor data and data with move, depth, bound, age and score packed.
+        # Bucket has depth-preferred entry followed by always-replace entry
+        self.table = None
+        self.age = 0
+
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+        if buffer is not None:
+            self.attach(buffer)
+        else:
+            self.allocate(size_mb)
+
+    def allocate(self, size_mb):
+        """Preallocate table to fit memory budget"""
+        self.size_mb = size_mb
+        self.buckets_num = max(1, int(size_mb * 1024 * 1024) // (ENTRY_BYTES * BUCKET_ENTRIES))
+        # Free previous table before allocating the new one
+        self.table = None
+        self.table = array('Q', [0]) * (self.buckets_num * BUCKET_ENTRIES * ENTRY_BYTES // 8)
+
+    def attach(self, buffer):
+        """Use writable buffer as table, e.g. shared memory of several processes searching together"""
+        self.buckets_num = len(buffer) // (ENTRY_BYTES * BUCKET_ENTRIES)
+        if not self.buckets_num:
+            raise ValueError("buffer is too small for transposition table")
+        self.size_mb = self.buckets_num * ENTRY_BYTES * BUCKET_ENTRIES / (1024 * 1024)
+        self.table = memoryview(buffer)[:self.buckets_num * BUCKET_ENTRIES * ENTRY_BYTES].cast('Q')
+
+    def release(self):
+        """Drop reference to attached buffer so it can be closed"""
+        if isinstance(self.table, memoryview):
+            self.table.release()
+        self.table = None
+
+    def clear(self):
+        """Forget all entries and statistics, e.g. between games"""
+        # Zero in place, attached buffer stays shared
+        table_bytes = memoryview(self.table).cast('B')
+        zeros = bytes(min(CLEAR_CHUNK_BYTES, len(table_bytes)))
+        for start in range(0, len(table_bytes), len(zeros)):
+            end = min(start + len(zeros), len(table_bytes))
+            table_bytes[start:end] = zeros[:end - start]
+        table_bytes.release()
+        self.age = 0
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Age entries of previous searches so they are replaced first"""
+        self.age = (self.age + 1) & AGE_MASK
+
+    def set_age(self, age):
+        """Store entries with given age, e.g. one of search running in another process"""
+        self.age = age & AGE_MASK
+
+    def probe(self, key):
+        """Get move, depth, bound and score stored for position key, None if there is no entry"""
+        self.probes += 1
+        index = (key % self.buckets_num) * BUCKET_ENTRIES * 2
+        table = self.table
+
+        for entry in range(index, index + BUCKET_ENTRIES * 2, 2):
+            data = table[entry + 1]
+            # Key is stored xor-ed with data, so torn writes don't match
+            if data and table[entry] ^ data == key:
+                self.hits += 1
+                return (data & 0xFFFF, data >> 16 & 0xFF, data >> 24 & 3,
+                        (data >> 32) - SCORE_OFFSET)
+
+        return None
+
+    def store(self, key, move, depth, bound, score):
+        """Save search result of position"""
+        self.stores += 1
+        index = (key % self.buckets_num) * BUCKET_ENTRIES * 2
+        table = self.table
+
+        data = (move | min(depth, 0xFF) << 16 | bound << 24 | self.age << 26 |
+                (score + SCORE_OFFSET) << 32)
+
+        # Depth-preferred entry keeps deeper results of current search
+        stored_data = table[index + 1]
+        if not stored_data or table[index] ^ stored_data == key or \
+           depth >= (stored_data >> 16 & 0xFF) or (stored_data >> 26 & AGE_MASK) != self.age:
+            entry = index
+        else:
+            entry = index + 2
+
+        table[entry] = key ^ data
+        table[entry + 1] = data
+
+    def hit_rate(self):
+        """Get share of probes which found an entry"""
+        return self.hits / self.probes if self.probes else 0.0
@@ -12,6 +12,7 @@ class UI:
         self.board = board
 
         self.screen = None
+        self.images_dir = "D:\\users\\akhmatov-nv\\PycharmProjects\\chess\\images\\"
         self.screen_width = 120  # 120 or 480
         self.screen_height = 120  # 120 or 480
         self.bg_color = (0, 0, 0)
@@ -23,6 +24,7 @@ class UI:
         self.previous_location = None
 
         self.initialize_screen()
+        self.load_piece_images()
         self.initialize_scenes()
 
     def initialize_screen(self):
@@ -31,6 +33,16 @@ class UI:
         self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
         pygame.display.set_caption("Chess")
 
+    def load_piece_images(self):
+        """"Load images of pieces once there is a screen to draw them on"""
+        images = {}
+        for piece in self.board.pieces.get_all():
+            image_filename = piece.get_image_filename()
+            # moved and unmoved versions of piece share the image
+            if image_filename not in images:
+                images[image_filename] = pygame.image.load(self.images_dir + image_filename)
+            piece.set_image(images[image_filename])
+
     def initialize_scenes(self):
         """"Create scenes to use during game"""
         self.scenes['game'] = GameScene(self, self.engine, self.board)
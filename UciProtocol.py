@@ -0,0 +1,213 @@
+import asyncio
+import sys
+import threading
+
+from Board import Board, START_FEN
+from Engine import Engine
+from Move import find_move, move_name
+from PiecesCollection import PiecesCollection
+from Search import MATE_SCORE, MAX_DEPTH
+from SearchWorker import SearchWorker
+from TimeManager import TimeManager
+from TranspositionTable import TranspositionTable
+
+ENGINE_NAME = "chess"
+ENGINE_AUTHOR = "akumatawa"
+
+DEFAULT_HASH_MB = 16
+MAX_HASH_MB = 4096
+
+# Parameters of go command followed by a value
+GO_PARAMETERS = ("wtime", "btime", "winc", "binc", "movestogo", "movetime", "depth", "nodes")
+
+
+def score_text(score):
+    """Get score in UCI notation, mate scores are given in moves"""
+    if abs(score) >= MATE_SCORE - MAX_DEPTH:
+        moves = (MATE_SCORE - abs(score) + 1) // 2
+        return "mate " + str(moves if score > 0 else -moves)
+
+    return "cp " + str(score)
+
+
+class UciProtocol:
+    def __init__(self, board_type=Board, hash_mb=DEFAULT_HASH_MB, output=sys.stdout):
+        self.board_type = board_type
+        self.output = output
+        # Info lines are written from search thread
+        self.output_lock = threading.Lock()
+
+        self.pieces = PiecesCollection()
+        self.pieces.initialize_pieces()
+        self.board = board_type.from_fen(START_FEN, self.pieces)
+        self.engine = Engine(self.board, self.pieces, None)
+
+        self.transposition_table = TranspositionTable(hash_mb)
+        self.search_worker = SearchWorker(self.pieces, self.transposition_table)
+        self.time_manager = TimeManager()
+
+        self.search_task = None
+        # Set when infinite search may report its best move
+        self.stop_requested = None
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    async def run(self, input_stream=sys.stdin):
+        """Read commands until quit, search runs meanwhile so stop takes effect at once"""
+        loop = asyncio.get_running_loop()
+        self.stop_requested = asyncio.Event()
+
+        while True:
+            line = await loop.run_in_executor(None, input_stream.readline)
+            # End of input quits as well
+            if not line or not await self.handle(line.strip()):
+                break
+
+        # Search running on quit reports its move first
+        await self.__finish_search()
+
+    async def handle(self, line):
+        """Respond to command, False if engine should quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send("id name " + ENGINE_NAME)
+            self.send("id author " + ENGINE_AUTHOR)
+            self.send("option name Hash type spin default {} min 1 max {}".format(DEFAULT_HASH_MB, MAX_HASH_MB))
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "setoption":
+            await self.__finish_search()
+            self.__set_option(arguments)
+        elif command == "ucinewgame":
+            await self.__finish_search()
+            self.search_worker.new_game()
+        elif command == "position":
+            await self.__finish_search()
+            self.__set_position(arguments)
+        elif command == "go":
+            await self.__finish_search()
+            self.__go(arguments)
+        elif command == "stop":
+            self.search_worker.stop()
+            self.stop_requested.set()
+        elif command == "quit":
+            return False
+        else:
+            self.send("info string unknown command " + command)
+
+        return True
+
+    async def __finish_search(self):
+        """Stop search started by previous go and wait until its best move is reported"""
+        if self.search_task is None:
+            return
+
+        self.search_worker.stop()
+        self.stop_requested.set()
+        await self.search_task
+        self.search_task = None
+
+    def __set_option(self, arguments):
+        """Apply setoption name <name> value <value>"""
+        if "name" not in arguments or "value" not in arguments:
+            return
+        name = " ".join(arguments[arguments.index("name") + 1:arguments.index("value")])
+        value = " ".join(arguments[arguments.index("value") + 1:])
+
+        if name.lower() == "hash":
+            if not value.isdigit():
+                self.send("info string invalid value " + value + " of option " + name)
+                return
+            self.transposition_table.allocate(min(max(int(value), 1), MAX_HASH_MB))
+
+    def __set_position(self, arguments):
+        """Set up position startpos or fen <fen> followed by moves"""
+        if "moves" in arguments:
+            moves_index = arguments.index("moves")
+            position, moves = arguments[:moves_index], arguments[moves_index + 1:]
+        else:
+            position, moves = arguments, []
+
+        if position[:1] == ["startpos"]:
+            fen = START_FEN
+        elif position[:1] == ["fen"]:
+            fen = " ".join(position[1:])
+        else:
+            self.send("info string unknown position")
+            return
+
+        try:
+            board = self.board_type.from_fen(fen, self.pieces)
+        except ValueError as error:
+            self.send("info string " + str(error))
+            return
+        for name in moves:
+            self.engine.compute_legal_moves(board)
+            encoded_move = find_move(board.legal_moves, name)
+            if encoded_move is None:
+                self.send("info string illegal move " + name)
+                break
+            self.engine.make_move(board, encoded_move)
+
+        self.engine.compute_legal_moves(board)
+        self.board = board
+        self.engine.board = board
+
+    def __go(self, arguments):
+        """Start search with limits of go command"""
+        parameters = {}
+        for index, argument in enumerate(arguments[:-1]):
+            if argument in GO_PARAMETERS:
+                value = arguments[index + 1]
+                # Search goes on without parameter which has invalid value, go must get best move anyway
+                if not value.lstrip("-").isdigit():
+                    self.send("info string invalid value " + value + " of " + argument)
+                    continue
+                parameters[argument] = int(value)
+        infinite = "infinite" in arguments
+
+        # Search needs at least one iteration
+        depth = max(parameters["depth"], 1) if "depth" in parameters else None
+        node_limit = parameters.get("nodes")
+        time_limit = soft_time_limit = None
+        if "movetime" in parameters:
+            time_limit = parameters["movetime"] / 1000
+        elif not infinite:
+            # Clock and increment of side to move are in milliseconds
+            colour_prefix = "w" if self.board.current_colour() == "white" else "b"
+            if colour_prefix + "time" in parameters:
+                soft_time_limit, time_limit = self.time_manager.allocate(
+                    parameters[colour_prefix + "time"] / 1000, parameters.get(colour_prefix + "inc", 0) / 1000,
+                    parameters.get("movestogo"))
+
+        self.stop_requested.clear()
+        self.search_worker.start(self.board, depth, time_limit, node_limit, soft_time_limit, self.__send_info)
+        self.search_task = asyncio.ensure_future(self.__send_best_move(infinite))
+
+    def __send_info(self, result):
+        """Report finished iteration"""
+        self.send("info depth {} score {} nodes {} nps {:.0f} time {:.0f} pv {}".format(
+            result.depth, score_text(result.score), result.nodes, result.nodes_per_second, result.elapsed * 1000,
+            " ".join(move_name(encoded_move) for encoded_move in result.principal_variation)))
+
+    async def __send_best_move(self, infinite):
+        """Wait for search without blocking commands and report best move"""
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, self.search_worker.wait)
+
+        # Infinite search reports its move only when told to stop
+        if infinite:
+            await self.stop_requested.wait()
+
+        if result is None or result.best_move is None:
+            self.send("bestmove 0000")
+        else:
+            self.send("bestmove " + move_name(result.best_move))
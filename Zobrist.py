@@ -0,0 +1,28 @@
+import random
+
+# Fixed seed, so keys are the same in every process and run
+generator = random.Random(0x5EED)
+
+# Key of piece index on square index
+PIECE_KEYS = tuple(tuple(generator.getrandbits(64) for _ in range(64)) for _ in range(12))
+# Key added when black is to move
+SIDE_KEY = generator.getrandbits(64)
+# Key of each combination of castling rights, no rights add nothing
+CASTLING_KEYS = (0,) + tuple(generator.getrandbits(64) for _ in range(15))
+# Key of un passant attack file
+UN_PASSANT_KEYS = tuple(generator.getrandbits(64) for _ in range(8))
+
+# Castling rights flags
+WHITE_KING_SIDE = 1
+WHITE_QUEEN_SIDE = 2
+BLACK_KING_SIDE = 4
+BLACK_QUEEN_SIDE = 8
+
+# Castling right with squares of king and rook which have to stay unmoved for it
+CASTLING = ((WHITE_KING_SIDE, (0, 4), (0, 7)),
+            (WHITE_QUEEN_SIDE, (0, 4), (0, 0)),
+            (BLACK_KING_SIDE, (7, 4), (7, 7)),
+            (BLACK_QUEEN_SIDE, (7, 4), (7, 0)))
+CASTLING_RIGHTS_NUM = len(CASTLING)
+# Indexes of squares affecting castling rights
+CASTLING_SQUARES = frozenset((0, 4, 7, 56, 60, 63))
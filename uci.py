@@ -0,0 +1,22 @@
+import argparse
+import asyncio
+import sys
+
+from BitBoard import BitBoard
+from Board import Board
+from UciProtocol import UciProtocol, DEFAULT_HASH_MB
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Universal Chess Interface engine over stdin and stdout")
+    parser.add_argument("--hash", type=int, default=DEFAULT_HASH_MB, help="transposition table size in MB")
+    parser.add_argument("--bitboard", action="store_true", help="use bitboard backend")
+    args = parser.parse_args()
+
+    protocol = UciProtocol(BitBoard if args.bitboard else Board, args.hash)
+    asyncio.run(protocol.run())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())